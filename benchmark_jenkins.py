@@ -0,0 +1,336 @@
+"""
+Offline benchmark of main_jenkins.py backup, zip and restore against a local mock Jenkins
+
+"""
+import sys,os,argparse,json,time,shutil,tempfile,resource,multiprocessing,contextlib,http.server,urllib.parse
+import main_jenkins
+from main_jenkins import FOLDER_CLASS
+
+JOB_CLASS = 'hudson.model.FreeStyleProject'
+
+class MockJenkins(http.server.BaseHTTPRequestHandler):
+    """
+    Stand-in Jenkins serving synthetic api/json, config.xml, progressiveText and
+    pluginManager responses; POSTs (restore) are accepted and discarded
+    """
+    protocol_version = 'HTTP/1.1'
+    jobs = {}
+    plugins = []
+    views = []
+    config = b''
+    log = b''
+    latency = 0.0
+    requests_served = None
+    cache = {}
+
+    @classmethod
+    def configure(cls, jobs, folders, plugins, views, config_size, log_size, latency, requests_served):
+        """
+        Build the synthetic controller: jobs spread round robin over folders when folders > 0
+        """
+        cls.jobs = {}
+        for index in range(jobs):
+            name = 'job-{:06d}'.format(index)
+            if folders:
+                cls.jobs.setdefault('folder-{:04d}'.format(index % folders), {})[name] = None
+            else:
+                cls.jobs[name] = None
+        cls.plugins = [{'shortName': 'plugin-{:04d}'.format(index), 'version': '1.0'} for index in range(plugins)]
+        cls.views = [{'name': 'view-{:04d}'.format(index), 'url': ''} for index in range(views)]
+        body = '  <description>benchmark</description>\n' * max(1, config_size // 40)
+        cls.config = ('<?xml version="1.1" encoding="UTF-8"?>\n<project>\n' + body + '</project>\n').encode('utf-8')
+        cls.folder_config = ('<?xml version="1.1" encoding="UTF-8"?>\n<' + FOLDER_CLASS + '>\n' + body + '</' + FOLDER_CLASS + '>\n').encode('utf-8')
+        line = b'[benchmark] synthetic console output line\n'
+        cls.log = (line * (log_size // len(line) + 1))[:log_size]
+        cls.latency = latency
+        cls.requests_served = requests_served
+        cls.cache = {}
+
+    @classmethod
+    def items(cls, tree, depth):
+        """
+        Jobs and folders of a tree level in /api/json shape, nested depth levels deep
+        """
+        items = []
+        for name, children in tree.items():
+            if children is None:
+                items.append({'_class': JOB_CLASS, 'name': name, 'url': '', 'lastBuild': {'number': 1}})
+            else:
+                item = {'_class': FOLDER_CLASS, 'name': name, 'url': ''}
+                if depth > 0:
+                    item['jobs'] = cls.items(children, depth - 1)
+                items.append(item)
+        return items
+
+    @classmethod
+    def node(cls, parts):
+        """
+        Get the subtree at a folder path
+        """
+        tree = cls.jobs
+        for part in parts:
+            tree = tree[part]
+        return tree
+
+    def log_message(self, *args):
+        """
+        Keep the request log off the benchmark output
+        """
+        pass
+
+    def send(self, body, content_type='application/json', headers=None):
+        """
+        Send a 200 response with a JSON or raw body
+        """
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def not_found(self):
+        """
+        Send an empty 404
+        """
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def count(self):
+        """
+        Apply the simulated latency and count the request
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self.requests_served.get_lock():
+            self.requests_served.value += 1
+
+    def do_GET(self):
+        """
+        Serve the read endpoints the backup uses
+        """
+        self.count()
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        segments = url.path.split('/')
+        parts = []
+        while len(segments) > 2 and segments[1] == 'job':
+            parts.append(urllib.parse.unquote(segments[2]))
+            segments = segments[:1] + segments[3:]
+        rest = '/'.join(segments)
+        try:
+            if url.path == '/api/json':
+                key = ('root', url.query)
+                if key not in self.cache:
+                    tree = query.get('tree', [''])[0]
+                    self.cache[key] = json.dumps({'jobs': self.items(self.jobs, tree.count('jobs[') - 1), 'views': self.views}).encode('utf-8')
+                return self.send(self.cache[key])
+            if url.path == '/pluginManager/api/json':
+                return self.send({'plugins': self.plugins})
+            if url.path == '/computer/api/json':
+                return self.send({'computer': [{'displayName': 'master'}]})
+            if url.path.startswith('/pluginManager/plugin/') or url.path.startswith('/view/'):
+                if url.path.endswith('/config.xml'):
+                    return self.send(self.config, 'application/xml')
+                return self.send({'views': self.views})
+            if not parts:
+                return self.not_found()
+            node = self.node(parts)
+            if rest == '/api/json':
+                if isinstance(node, dict):
+                    return self.send({'jobs': self.items(node, 0)})
+                builds = [{'number': 1, 'timestamp': int(time.time() * 1000), 'result': 'SUCCESS'}]
+                return self.send({'lastBuild': {'number': 1}, 'builds': builds, 'allBuilds': builds})
+            if rest == '/config.xml':
+                return self.send(self.folder_config if isinstance(node, dict) else self.config, 'application/xml')
+            if rest == '/lastBuild/api/json':
+                return self.send({'number': 1})
+            if rest.endswith('/logText/progressiveText') or rest.endswith('/consoleText'):
+                start = int(query.get('start', ['0'])[0])
+                return self.send(self.log[start:], 'text/plain', {'X-Text-Size': str(len(self.log))})
+        except KeyError:
+            pass
+        return self.not_found()
+
+    def do_POST(self):
+        """
+        Accept every create and update a restore sends
+        """
+        self.count()
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+def serve_mock(options, requests_served, ready):
+    """
+    Run the mock controller, in its own process so it does not count towards client RSS and I/O
+    """
+    MockJenkins.configure(options.jobs, options.folders, options.plugins, options.views, options.config_size,
+                          options.log_size, options.latency / 1000.0, requests_served)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), MockJenkins)
+    server.daemon_threads = True
+    ready.put(server.server_port)
+    server.serve_forever()
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def disk_io():
+    """
+    Bytes read and written by this process, from /proc/self/io or block counts of getrusage
+    """
+    try:
+        with open('/proc/self/io', 'r') as io_file:
+            counters = dict(line.split(': ') for line in io_file.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_inblock * 512, usage.ru_oublock * 512
+
+class Benchmark():
+    """
+    Time the phases of one backup/zip/restore cycle
+    """
+    def __init__(self, requests_served, quiet=True):
+        self.requests_served = requests_served
+        self.quiet = quiet
+        self.phases = []
+
+    def phase(self, name, function, *args):
+        """
+        Run function(*args) and record wall time, requests/s, peak RSS and disk I/O
+        """
+        requests_before = self.requests_served.value
+        read_before, written_before = disk_io()
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.ExitStack() as stack:
+            if self.quiet:
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            result = function(*args)
+        seconds = time.perf_counter() - started
+        read_after, written_after = disk_io()
+        requests = self.requests_served.value - requests_before
+        self.phases.append({
+            'phase': name,
+            'seconds': seconds,
+            'requests': requests,
+            'requests_per_second': requests / seconds if seconds > 0 else 0.0,
+            'peak_rss': peak_rss(),
+            'read_bytes': read_after - read_before,
+            'written_bytes': written_after - written_before,
+            'result': bool(result),
+        })
+        return result
+
+def run_backup(jenkins):
+    """
+    Backup phase: back up everything and write the manifest
+    """
+    result = jenkins.backup_all()
+    jenkins.flush_manifests()
+    jenkins.write_manifest_to_backup()
+    return result
+
+def run_zip(jenkins):
+    """
+    Zip phase: compress the backup directory and remove it
+    """
+    jenkins.compress_all_files_in_dir(jenkins.zip_file, jenkins.backup_dir)
+    jenkins.remove_all_files_in_dir(jenkins.backup_dir)
+    return os.path.exists(jenkins.zip_file)
+
+def run_restore(jenkins):
+    """
+    Restore phase: extract the archive and restore everything
+    """
+    jenkins.decompress_all_files_in_dir(jenkins.zip_file, jenkins.restore_dir)
+    return jenkins.restore_all()
+
+def run_scale(options, jobs):
+    """
+    Start a mock controller with jobs jobs and benchmark backup, zip and restore against it
+    """
+    options = argparse.Namespace(**dict(vars(options), jobs=jobs))
+    requests_served = multiprocessing.Value('l', 0)
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_mock, args=(options, requests_served, ready), daemon=True)
+    server.start()
+    work_dir = tempfile.mkdtemp(prefix='jenkins-benchmark-', dir=options.work_dir)
+    cwd = os.getcwd()
+    try:
+        port = ready.get(timeout=60)
+        jenkins_args = ['-u', 'http://127.0.0.1:{}'.format(port),
+                        '-bd', os.path.join(work_dir, 'backup'),
+                        '-zd', os.path.join(work_dir, 'zip'),
+                        '-w', str(options.workers)] + options.jenkins_args
+        # details.json is written relative to the working directory
+        os.chdir(work_dir)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            jenkins = main_jenkins.MyJenkins(main_jenkins.build_argparser().parse_args(jenkins_args))
+        jenkins.loggers = options.logs
+        jenkins.create_backup_dir()
+        benchmark = Benchmark(requests_served, quiet=not options.verbose)
+        benchmark.phase('backup', run_backup, jenkins)
+        benchmark.phase('zip', run_zip, jenkins)
+        if os.path.exists(jenkins.zip_file):
+            archive_size = os.path.getsize(jenkins.zip_file)
+        else:
+            archive_size = 0
+        benchmark.phase('restore', run_restore, jenkins)
+        return {'jobs': jobs, 'folders': options.folders, 'log_size': options.log_size, 'latency_ms': options.latency,
+                'workers': options.workers, 'archive_size': archive_size, 'phases': benchmark.phases}
+    finally:
+        os.chdir(cwd)
+        server.terminate()
+        server.join()
+        if not options.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def print_report(results):
+    """
+    Print one row per job count and phase
+    """
+    print('{:>8} {:<8} {:>9} {:>9} {:>9} {:>10} {:>11} {:>11}'.format('jobs', 'phase', 'seconds', 'requests', 'req/s', 'peak rss', 'read', 'written'))
+    for result in results:
+        for phase in result['phases']:
+            print('{:>8} {:<8} {:>9.2f} {:>9} {:>9.1f} {:>8.1f}MB {:>9.1f}MB {:>9.1f}MB{}'.format(
+                result['jobs'], phase['phase'], phase['seconds'], phase['requests'], phase['requests_per_second'],
+                phase['peak_rss'] / 1024 / 1024, phase['read_bytes'] / 1024 / 1024, phase['written_bytes'] / 1024 / 1024,
+                '' if phase['result'] else '  (failed)'))
+        print('{:>8} archive {:.1f}MB'.format(result['jobs'], result['archive_size'] / 1024 / 1024))
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser(description='Benchmark Jenkins backup and restore against a local mock controller')
+    argparser.add_argument('-s', '--scales', help='Comma separated job counts to benchmark (default 1000)', default='1000')
+    argparser.add_argument('-f', '--folders', help='Spread jobs over this many folders', type=int, default=0)
+    argparser.add_argument('-p', '--plugins', help='Number of plugins', type=int, default=50)
+    argparser.add_argument('-v', '--views', help='Number of views', type=int, default=10)
+    argparser.add_argument('-cs', '--config_size', help='Bytes per config.xml', type=int, default=4096)
+    argparser.add_argument('-ls', '--log_size', help='Bytes per console log', type=int, default=64 * 1024)
+    argparser.add_argument('-l', '--logs', help='Back up console logs too', action='store_true')
+    argparser.add_argument('-lt', '--latency', help='Milliseconds of latency injected per request', type=float, default=0.0)
+    argparser.add_argument('-w', '--workers', help='MyJenkins workers', type=int, default=8)
+    argparser.add_argument('-wd', '--work_dir', help='Directory for the benchmark backups (default system temp)')
+    argparser.add_argument('-k', '--keep', help='Keep the backup and archive of each run', action='store_true')
+    argparser.add_argument('-o', '--output', help='Write the results as JSON to this file')
+    argparser.add_argument('--verbose', help='Show main_jenkins output', action='store_true')
+    argparser.add_argument('jenkins_args', nargs=argparse.REMAINDER, help='Extra main_jenkins.py options after --, e.g. -- -c lzma -cw 4')
+
+    options = argparser.parse_args()
+    if options.jenkins_args[:1] == ['--']:
+        options.jenkins_args = options.jenkins_args[1:]
+    results = [run_scale(options, int(jobs)) for jobs in options.scales.split(',')]
+    print_report(results)
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
@@ -2,7 +2,11 @@
 Script to backup and restore jenkins jobs, plugins and configuration
 
 """
-import sys,os,requests,argparse,shutil,json,zipfile,xml.etree.ElementTree as ET,tempfile,time
+import sys,os,re,requests,argparse,shutil,json,zipfile,xml.etree.ElementTree as ET,tempfile,time,threading,concurrent.futures,asyncio,dataclasses,hashlib,glob,itertools,struct,random,zlib,bz2,lzma,queue,http.server,cProfile,pstats,tracemalloc,io,difflib,sqlite3
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 #list jenkins Api endpoints
 # /api/json - Returns JSON data describing the Jenkins instance.
@@ -35,10 +39,1432 @@ import sys,os,requests,argparse,shutil,json,zipfile,xml.etree.ElementTree as ET,
 
 # /pluginManager/api/xml - Returns XML data for all Jenkins plugins.
 
+FOLDER_CLASS = 'com.cloudbees.hudson.plugins.folder.Folder'
+
+COMPRESSION_CODECS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+def compress_member(file_name, arcname, compression, compresslevel=None, spool_size=8 * 1024 * 1024, chunk_size=1024 * 1024):
+    """
+    Compress a file into a spool the way zipfile stores a member of that compression,
+    so members can be compressed on a thread pool and appended by a ZipAssembler.
+    Returns the ZipInfo (CRC and sizes filled in) and the spool
+    """
+    info = zipfile.ZipInfo.from_file(file_name, arcname)
+    info.compress_type = compression
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+    if compression == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(-1 if compresslevel is None else compresslevel, zlib.DEFLATED, -15)
+    elif compression == zipfile.ZIP_BZIP2:
+        compressor = bz2.BZ2Compressor(9 if compresslevel is None else compresslevel)
+    elif compression == zipfile.ZIP_LZMA:
+        # the lzma defaults zipfile uses: lc=3, lp=0, pb=2, 8 MiB dictionary, end marker flagged
+        properties = struct.pack('<BI', (2 * 5 + 0) * 9 + 3, 1 << 23)
+        spool.write(struct.pack('<BBH', 9, 4, len(properties)) + properties)
+        compressor = lzma.LZMACompressor(lzma.FORMAT_RAW, filters=[{'id': lzma.FILTER_LZMA1, 'dict_size': 1 << 23, 'lc': 3, 'lp': 0, 'pb': 2}])
+        info.flag_bits |= 0x02
+    else:
+        compressor = None
+    crc = 0
+    size = 0
+    with open(file_name, 'rb') as source:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            spool.write(compressor.compress(chunk) if compressor is not None else chunk)
+    if compressor is not None:
+        spool.write(compressor.flush())
+    info.CRC = crc
+    info.file_size = size
+    info.compress_size = spool.tell()
+    return info, spool
+
+class ZipAssembler():
+    """
+    Zip archive assembled from members compressed elsewhere (see compress_member).
+    Local headers come from ZipInfo.FileHeader, the central directory and end records
+    are written here following the zip format, zip64 records included when needed
+    """
+    def __init__(self, zip_file_name):
+        self.zip_file = open(zip_file_name, 'wb')
+        self.entries = []
+
+    def add(self, info, payload):
+        """
+        Append a member, payload being an open file holding its compressed data
+        """
+        info.header_offset = self.zip_file.tell()
+        self.zip_file.write(info.FileHeader(info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT))
+        payload.seek(0)
+        shutil.copyfileobj(payload, self.zip_file, 1024 * 1024)
+        self.entries.append(info)
+
+    def central_directory_entry(self, info):
+        """
+        Central directory record of a member, with a zip64 extra field for large values
+        """
+        file_size, compress_size, header_offset = info.file_size, info.compress_size, info.header_offset
+        zip64 = []
+        if file_size > zipfile.ZIP64_LIMIT:
+            zip64.append(file_size)
+            file_size = 0xffffffff
+        if compress_size > zipfile.ZIP64_LIMIT:
+            zip64.append(compress_size)
+            compress_size = 0xffffffff
+        if header_offset > zipfile.ZIP64_LIMIT:
+            zip64.append(header_offset)
+            header_offset = 0xffffffff
+        extra = info.extra
+        version = info.extract_version
+        if zip64:
+            extra = struct.pack('<HH' + 'Q' * len(zip64), 1, 8 * len(zip64), *zip64) + extra
+            version = max(version, zipfile.ZIP64_VERSION)
+        try:
+            name, flag_bits = info.filename.encode('ascii'), info.flag_bits
+        except UnicodeEncodeError:
+            name, flag_bits = info.filename.encode('utf-8'), info.flag_bits | 0x800
+        dt = info.date_time
+        dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+        dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+        return struct.pack('<4s4B4HL2L5H2L', b'PK\x01\x02', max(version, info.create_version), info.create_system, version, info.reserved,
+                           flag_bits, info.compress_type, dostime, dosdate, info.CRC, compress_size, file_size,
+                           len(name), len(extra), 0, 0, info.internal_attr, info.external_attr, header_offset) + name + extra
+
+    def close(self):
+        """
+        Write the central directory and the end records, then close the file
+        """
+        try:
+            start = self.zip_file.tell()
+            for info in self.entries:
+                self.zip_file.write(self.central_directory_entry(info))
+            end = self.zip_file.tell()
+            count, size, offset = len(self.entries), end - start, start
+            if count >= 0xffff or size > zipfile.ZIP64_LIMIT or offset > zipfile.ZIP64_LIMIT:
+                self.zip_file.write(struct.pack('<4sQ2H2L4Q', b'PK\x06\x06', 44, zipfile.ZIP64_VERSION, zipfile.ZIP64_VERSION, 0, 0, count, count, size, offset))
+                self.zip_file.write(struct.pack('<4sLQL', b'PK\x06\x07', 0, end, 1))
+                count, size, offset = min(count, 0xffff), min(size, 0xffffffff), min(offset, 0xffffffff)
+            self.zip_file.write(struct.pack('<4s4H2LH', b'PK\x05\x06', 0, 0, count, count, size, offset, 0))
+        finally:
+            self.zip_file.close()
+
+def job_url_path(path):
+    """
+    Turn a folder path like team/release/build into /job/team/job/release/job/build
+    """
+    return ''.join('/job/' + name for name in path.split('/'))
+
+@dataclasses.dataclass
+class InventoryItem:
+    """
+    Job or folder from the inventory tree query
+    """
+    name: str
+    path: str
+    item_class: str = ''
+    url: str = ''
+    last_build: int = None
+    is_folder: bool = False
+    children: list = dataclasses.field(default_factory=list)
+    # False when listing the folder failed, its children must be fetched live
+    complete: bool = True
+
+    def as_job(self):
+        """
+        Same shape as an entry of /api/json jobs
+        """
+        return {'_class': self.item_class, 'name': self.name, 'url': self.url}
+
+@dataclasses.dataclass
+class Inventory:
+    """
+    Whole controller tree: jobs and nested folders with last build numbers, views, nodes and plugins
+    """
+    jobs: list
+    views: list
+    nodes: list
+    plugins: list
+    fetched_at: float = 0.0
+    items: dict = dataclasses.field(default_factory=dict)
+
+    def __post_init__(self):
+        """
+        Index every item by folder path
+        """
+        for item in self.walk():
+            self.items[item.path] = item
+
+    def walk(self):
+        """
+        Walk jobs and folders breadth first
+        """
+        queue = list(self.jobs)
+        while queue:
+            item = queue.pop(0)
+            yield item
+            queue.extend(item.children)
+
+    def find(self, path):
+        """
+        Find a job or folder by its folder path
+        """
+        return self.items.get(path)
+
+    def folders(self):
+        """
+        Top level folders
+        """
+        return [item for item in self.jobs if item.is_folder]
+
+class Selection():
+    """
+    Include/exclude patterns and item types matched against inventory paths.
+    A glob matches the folder path ('team-*/release/**': '*' stays inside one folder,
+    '**' spans folders), a glob without '/' matches the item name at any depth and
+    're:<regex>' searches the path. Without include patterns everything is included.
+    """
+    types = ('job', 'folder', 'view', 'node', 'plugin')
+
+    def __init__(self, include=None, exclude=None, types=None, top_level=False):
+        self.include = [self.compile(pattern) for pattern in include or []]
+        self.exclude = [self.compile(pattern) for pattern in exclude or []]
+        self.kinds = set(types) if types else set(self.types)
+        # top_level keeps items nested in folders out, as the *_except_* options always did
+        self.top_level = top_level
+        unknown = self.kinds - set(self.types)
+        if unknown:
+            raise ValueError('unknown item type(s): ' + ', '.join(sorted(unknown)))
+
+    @staticmethod
+    def glob_to_regex(pattern):
+        """
+        Translate a folder path glob to a regex: '*' and '?' stop at '/', '**' crosses folders
+        """
+        parts = []
+        index = 0
+        while index < len(pattern):
+            if pattern.startswith('**/', index):
+                parts.append('(?:.*/)?')
+                index += 3
+            elif pattern.startswith('**', index):
+                parts.append('.*')
+                index += 2
+            elif pattern[index] == '*':
+                parts.append('[^/]*')
+                index += 1
+            elif pattern[index] == '?':
+                parts.append('[^/]')
+                index += 1
+            else:
+                parts.append(re.escape(pattern[index]))
+                index += 1
+        return ''.join(parts)
+
+    @classmethod
+    def compile(cls, pattern):
+        """
+        Get a function telling if a path matches pattern
+        """
+        if pattern.startswith('re:'):
+            regex = re.compile(pattern[3:])
+            return lambda path: regex.search(path) is not None
+        regex = re.compile(cls.glob_to_regex(pattern))
+        if '/' in pattern:
+            return lambda path: regex.fullmatch(path) is not None
+        return lambda path: regex.fullmatch(path.rsplit('/', 1)[-1]) is not None
+
+    def matches(self, kind, path):
+        """
+        Check if an item of type kind at folder path path is selected
+        """
+        if kind not in self.kinds:
+            return False
+        if self.top_level and '/' in path:
+            return False
+        if self.include and not any(match(path) for match in self.include):
+            return False
+        return not any(match(path) for match in self.exclude)
+
+class BackupManifest():
+    """
+    details.json held in memory and written once, atomically, by flush.
+    With journal=True every entry is also appended to a JSON Lines journal
+    so an interrupted run can be recovered; flush compacts it away.
+    """
+    def __init__(self, file_name, journal=False):
+        self.file_name = file_name
+        self.journal_name = os.path.splitext(file_name)[0] + '.jsonl'
+        self.journal = journal
+        self.journal_file = None
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        """
+        Load the previous details.json and replay a journal left by an interrupted run
+        """
+        try:
+            with open(self.file_name, 'r') as json_file:
+                self.entries = json.load(json_file)
+        except:
+            self.entries = {}
+        if os.path.exists(self.journal_name):
+            with open(self.journal_name, 'r') as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn last line of a crashed run
+                        continue
+                    if len(entry) == 2:
+                        # [parentkey, key] records a removal
+                        self.entries.get(entry[0], {}).pop(entry[1], None)
+                        continue
+                    parentkey, key, value = entry
+                    self.entries.setdefault(parentkey, {})[key] = value
+
+    def add(self, parentkey, key, value):
+        """
+        Add an entry
+        """
+        with self.lock:
+            self.entries.setdefault(parentkey, {})[key] = value
+            if self.journal:
+                if self.journal_file is None:
+                    self.journal_file = open(self.journal_name, 'a')
+                self.journal_file.write(json.dumps([parentkey, key, value]) + '\n')
+                self.journal_file.flush()
+
+    def remove(self, parentkey, key):
+        """
+        Remove an entry
+        """
+        with self.lock:
+            self.entries.get(parentkey, {}).pop(key, None)
+            if self.journal:
+                if self.journal_file is None:
+                    self.journal_file = open(self.journal_name, 'a')
+                self.journal_file.write(json.dumps([parentkey, key]) + '\n')
+                self.journal_file.flush()
+
+    def get(self, parentkey):
+        """
+        Get the entries under parentkey
+        """
+        with self.lock:
+            if parentkey not in self.entries:
+                return None
+            return dict(self.entries[parentkey])
+
+    def flush(self):
+        """
+        Write details.json atomically and compact the journal into it
+        """
+        with self.lock:
+            directory = os.path.dirname(os.path.abspath(self.file_name))
+            fd, tmp_name = tempfile.mkstemp(prefix='.details.', dir=directory)
+            with os.fdopen(fd, 'w') as json_file:
+                json.dump(self.entries, json_file, indent=2)
+            os.replace(tmp_name, self.file_name)
+            if self.journal_file is not None:
+                self.journal_file.close()
+                self.journal_file = None
+            if os.path.exists(self.journal_name):
+                os.remove(self.journal_name)
+
+class ContentStore():
+    """
+    Content-addressed backup store: each distinct config is stored once under
+    objects/<hash[:2]>/<hash> and every backup run is a snapshot mapping
+    backup paths to hashes in snapshots/<timestamp>.json
+    """
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.snapshots_dir = os.path.join(root, 'snapshots')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.snapshot = {}
+
+    def object_path(self, digest):
+        """
+        Get the blob path of a hash
+        """
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put(self, name, data):
+        """
+        Store data once and add name to the current snapshot
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as blob:
+                blob.write(data)
+            os.replace(tmp_name, path)
+        with self.lock:
+            self.snapshot[name] = digest
+        return digest
+
+    def get(self, digest):
+        """
+        Get the data of a hash
+        """
+        with open(self.object_path(digest), 'rb') as blob:
+            return blob.read()
+
+    def commit(self):
+        """
+        Write the current snapshot manifest and start a new one
+        """
+        with self.lock:
+            name = time.strftime('%Y%m%dT%H%M%S')
+            with open(os.path.join(self.snapshots_dir, name + '.json'), 'w') as snapshot_file:
+                json.dump(self.snapshot, snapshot_file, indent=2, sort_keys=True)
+            self.snapshot = {}
+        return name
+
+    def list_snapshots(self):
+        """
+        List snapshot names, oldest first
+        """
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.snapshots_dir) if name.endswith('.json'))
+
+    def read_snapshot(self, name=None):
+        """
+        Read a snapshot manifest, the newest one by default
+        """
+        if name is None:
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                return {}
+            name = snapshots[-1]
+        with open(os.path.join(self.snapshots_dir, name + '.json'), 'r') as snapshot_file:
+            return json.load(snapshot_file)
+
+    def materialize(self, dir_name, name=None):
+        """
+        Write every item of a snapshot under dir_name
+        """
+        for item_name, digest in self.read_snapshot(name).items():
+            path = os.path.join(dir_name, item_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as item_file:
+                item_file.write(self.get(digest))
+
+    def prune(self, keep):
+        """
+        Drop all but the newest keep snapshots and delete blobs no remaining snapshot references
+        """
+        snapshots = self.list_snapshots()
+        for name in snapshots[:max(0, len(snapshots) - keep)]:
+            os.remove(os.path.join(self.snapshots_dir, name + '.json'))
+        references = {}
+        for name in self.list_snapshots():
+            for digest in self.read_snapshot(name).values():
+                references[digest] = references.get(digest, 0) + 1
+        removed = 0
+        for root, dirs, files in os.walk(self.objects_dir):
+            for digest in files:
+                if references.get(digest, 0) == 0:
+                    os.remove(os.path.join(root, digest))
+                    removed += 1
+        return removed
+
+class ArchiveWriter():
+    """
+    Zip archive that backup files are written into directly instead of a staging directory.
+    The archive is built as <name>.partial and moved into place by close.
+    """
+    def __init__(self, zip_file_name, compression=zipfile.ZIP_DEFLATED, compresslevel=None, spool_size=8 * 1024 * 1024):
+        self.zip_file_name = zip_file_name
+        self.partial_name = zip_file_name + '.partial'
+        self.zip_file = zipfile.ZipFile(self.partial_name, 'w', compression, compresslevel=compresslevel)
+        self.spool_size = spool_size
+        self.lock = threading.Lock()
+
+    def writestr(self, name, data):
+        """
+        Add a member from memory
+        """
+        with self.lock:
+            self.zip_file.writestr(name, data)
+
+    def write_from(self, names, chunks):
+        """
+        Add the same streamed content under every name. The content is spooled (in memory
+        up to spool_size, then to a temporary file) before the archive is locked, so a slow
+        download never holds up the other writers.
+        Returns the number of bytes written per member
+        """
+        written = 0
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_size) as spool:
+            for chunk in chunks:
+                spool.write(chunk)
+                written += len(chunk)
+            self.copy_from(names, spool)
+        return written
+
+    def copy_from(self, names, spool):
+        """
+        Add the content of an open spool file under every name, locking only for the copy
+        """
+        with self.lock:
+            for name in names:
+                spool.seek(0)
+                with self.zip_file.open(name, 'w', force_zip64=True) as target:
+                    shutil.copyfileobj(spool, target, 1024 * 1024)
+
+    def close(self):
+        """
+        Finish the archive and move it into place
+        """
+        with self.lock:
+            self.zip_file.close()
+            os.replace(self.partial_name, self.zip_file_name)
+
+class ArchiveDiff():
+    """
+    Compare two backup archives through their central directories (CRC32 and size)
+    and the details.json inside them, without extracting anything. Only the members
+    that changed are decompressed, and only when a content diff is asked for.
+    """
+    kinds = (('folder/jobs/', 'job'), ('folder/log/', 'log'), ('jobs/log/', 'log'), ('jobs/', 'job'), ('plugins/', 'plugin'),
+             ('views/', 'view'), ('nodes/', 'node'), ('config/', 'config'), ('log/', 'log'))
+    skipped = ('details.json', 'snapshot.json')
+
+    def __init__(self, old_file_name, new_file_name):
+        self.old_file_name = old_file_name
+        self.new_file_name = new_file_name
+
+    @staticmethod
+    def manifest(zip_file):
+        """
+        Load the top-level details.json of an archive
+        """
+        for info in zip_file.infolist():
+            if info.filename.endswith('/details.json') and info.filename.count('/') == 1:
+                return json.loads(zip_file.read(info))
+        return {}
+
+    def members(self, zip_file):
+        """
+        Map (kind, item path) to the ZipInfo of every item in an archive
+        """
+        manifest = self.manifest(zip_file)
+        folder_jobs = manifest.get('FolderJobs', {})
+        hashes = manifest.get('Hashes', {})
+        members = {}
+        for info in zip_file.infolist():
+            if info.is_dir() or '/' not in info.filename:
+                continue
+            relative = info.filename.split('/', 1)[1]
+            if relative in self.skipped:
+                continue
+            kind, name = 'file', relative
+            for prefix, prefix_kind in self.kinds:
+                if relative.startswith(prefix):
+                    kind, name = prefix_kind, relative[len(prefix):]
+                    break
+            if kind != 'log' and name.endswith('.xml'):
+                name = name[:-4]
+            if relative.startswith('folder/jobs/') and '/' not in name and name in folder_jobs:
+                # flat layout of older backups, nested items are stored under their folder path
+                name = folder_jobs[name] + '/' + name
+            members[(kind, name)] = (info, hashes.get(relative))
+        return members
+
+    def compare(self):
+        """
+        Get added, removed and changed (kind, name) keys with the ZipInfo of both sides
+        """
+        with zipfile.ZipFile(self.old_file_name, 'r') as old_zip, zipfile.ZipFile(self.new_file_name, 'r') as new_zip:
+            old = self.members(old_zip)
+            new = self.members(new_zip)
+        added = sorted(key for key in new if key not in old)
+        removed = sorted(key for key in old if key not in new)
+        changed = []
+        for key in sorted(key for key in new if key in old):
+            (old_info, old_hash), (new_info, new_hash) = old[key], new[key]
+            if old_hash and new_hash:
+                different = old_hash != new_hash
+            else:
+                different = old_info.CRC != new_info.CRC or old_info.file_size != new_info.file_size
+            if different:
+                changed.append((key, old_info, new_info))
+        return added, removed, changed
+
+    def content_diff(self, changed):
+        """
+        Unified diff of the changed text members, decompressing only those
+        """
+        lines = []
+        with zipfile.ZipFile(self.old_file_name, 'r') as old_zip, zipfile.ZipFile(self.new_file_name, 'r') as new_zip:
+            for key, old_info, new_info in changed:
+                if key[0] == 'log':
+                    continue
+                old_text = old_zip.read(old_info).decode('utf-8', 'replace').splitlines(True)
+                new_text = new_zip.read(new_info).decode('utf-8', 'replace').splitlines(True)
+                lines.extend(difflib.unified_diff(old_text, new_text, old_info.filename, new_info.filename))
+        return ''.join(lines)
+
+    def report(self, content=False):
+        """
+        Print added (+), removed (-) and changed (~) items grouped by kind
+        """
+        started = time.time()
+        added, removed, changed = self.compare()
+        kinds = sorted(set(key[0] for key in added + removed + [entry[0] for entry in changed]))
+        for kind in kinds:
+            print('{}: +{} -{} ~{}'.format(kind, sum(1 for key in added if key[0] == kind), sum(1 for key in removed if key[0] == kind), sum(1 for entry in changed if entry[0][0] == kind)))
+            for key in added:
+                if key[0] == kind:
+                    print('  + ' + key[1])
+            for key in removed:
+                if key[0] == kind:
+                    print('  - ' + key[1])
+            for entry in changed:
+                if entry[0][0] == kind:
+                    print('  ~ ' + entry[0][1])
+        if not kinds:
+            print('no differences')
+        print('compared in {:.2f}s'.format(time.time() - started))
+        if content and changed:
+            print(self.content_diff(changed), end='')
+        return {'added': added, 'removed': removed, 'changed': [entry[0] for entry in changed]}
+
+class Catalog():
+    """
+    SQLite index of every item of every backup archive: type, folder path, name,
+    content hash, sizes, snapshot time and member offset, for point-in-time lookups
+    and item histories without opening the archives
+    """
+    schema = (
+        'CREATE TABLE IF NOT EXISTS archives (id INTEGER PRIMARY KEY, file_name TEXT UNIQUE, snapshot TEXT, size INTEGER, indexed_at TEXT)',
+        'CREATE TABLE IF NOT EXISTS items (archive_id INTEGER REFERENCES archives(id) ON DELETE CASCADE, kind TEXT, folder TEXT, name TEXT, '
+        'hash TEXT, size INTEGER, compressed_size INTEGER, member TEXT, header_offset INTEGER)',
+        'CREATE INDEX IF NOT EXISTS items_path ON items (name, folder, kind)',
+        'CREATE INDEX IF NOT EXISTS items_hash ON items (hash)',
+        'CREATE INDEX IF NOT EXISTS archives_snapshot ON archives (snapshot)',
+    )
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        os.makedirs(os.path.dirname(os.path.abspath(file_name)), exist_ok=True)
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        with self.connection:
+            for statement in self.schema:
+                self.connection.execute(statement)
+
+    def close(self):
+        """
+        Close the database connection
+        """
+        self.connection.close()
+
+    def index_archive(self, zip_file_name, snapshot=None):
+        """
+        Index an archive from its central directory and details.json, replacing an
+        earlier index of the same file. snapshot defaults to the archive mtime
+        """
+        zip_file_name = os.path.abspath(zip_file_name)
+        if snapshot is None:
+            snapshot = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(os.path.getmtime(zip_file_name)))
+        with zipfile.ZipFile(zip_file_name, 'r') as zip_file:
+            members = ArchiveDiff(zip_file_name, zip_file_name).members(zip_file)
+        rows = []
+        for (kind, path), (info, digest) in members.items():
+            folder, _, name = path.rpartition('/')
+            if kind == 'log':
+                folder, name = '', path
+            rows.append((kind, folder, name, digest or 'crc32:{:08x}'.format(info.CRC), info.file_size, info.compress_size, info.filename, info.header_offset))
+        with self.connection:
+            self.connection.execute('DELETE FROM archives WHERE file_name = ?', (zip_file_name,))
+            cursor = self.connection.execute('INSERT INTO archives (file_name, snapshot, size, indexed_at) VALUES (?, ?, ?, ?)',
+                                             (zip_file_name, snapshot, os.path.getsize(zip_file_name), time.strftime('%Y-%m-%dT%H:%M:%S')))
+            self.connection.executemany('INSERT INTO items VALUES ({}, ?, ?, ?, ?, ?, ?, ?, ?)'.format(cursor.lastrowid), rows)
+        return len(rows)
+
+    def query_item(self, item, kinds=None, before=None):
+        """
+        Versions of an item, given as folder path or bare name, newest first
+        """
+        folder, _, name = item.rpartition('/')
+        sql = ('SELECT archives.snapshot, archives.file_name, items.kind, items.folder, items.name, items.hash, items.size, items.member, items.header_offset '
+               'FROM items JOIN archives ON archives.id = items.archive_id WHERE items.name = ?')
+        params = [name]
+        if folder:
+            sql += ' AND items.folder = ?'
+            params.append(folder)
+        if kinds:
+            sql += ' AND items.kind IN ({})'.format(','.join('?' * len(kinds)))
+            params.extend(kinds)
+        if before is not None:
+            sql += ' AND archives.snapshot <= ?'
+            params.append(before)
+        sql += ' ORDER BY archives.snapshot DESC'
+        columns = ('snapshot', 'archive', 'kind', 'folder', 'name', 'hash', 'size', 'member', 'offset')
+        return [dict(zip(columns, row)) for row in self.connection.execute(sql, params)]
+
+    def history(self, item, kinds=None):
+        """
+        Print every archived version of item, marking where the content changed
+        """
+        versions = self.query_item(item, kinds)
+        for index, version in enumerate(versions):
+            changed = index == len(versions) - 1 or versions[index + 1]['hash'] != version['hash']
+            print('{} {} {:<6} {}{} {:>8} {} {}'.format(version['snapshot'], '*' if changed else ' ', version['kind'],
+                  version['folder'] + '/' if version['folder'] else '', version['name'], version['size'], version['hash'][:16], version['archive']))
+        if not versions:
+            print('{}: not in catalog'.format(item))
+        return versions
+
+    def at(self, item, timestamp, kinds=None):
+        """
+        Print the archive holding item as it was at timestamp (ISO, e.g. 2026-10-18T23:59)
+        """
+        versions = self.query_item(item, kinds, timestamp)
+        if not versions:
+            print('{}: not in catalog at {}'.format(item, timestamp))
+            return None
+        version = versions[0]
+        print('{} {} {}{} {} in {} member {} at offset {}'.format(version['snapshot'], version['kind'], version['folder'] + '/' if version['folder'] else '',
+              version['name'], version['hash'][:16], version['archive'], version['member'], version['offset']))
+        return version
+
+@dataclasses.dataclass
+class RestoreItem:
+    """
+    One unit of restore work
+    """
+    kind: str
+    name: str
+    folder: str = ''
+    file_name: str = None
+
+class RateLimiter():
+    """
+    Token bucket capping requests per second in front of an adaptive concurrency
+    limit: the limit grows by one per window of fast responses, shrinks by one when
+    latency passes target_latency and halves (with the rate) on 429/503
+    """
+    def __init__(self, rate=None, concurrency=16, target_latency=2.0):
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, rate or 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.max_concurrency = concurrency
+        self.limit = float(concurrency)
+        self.target_latency = target_latency
+        self.active = 0
+        self.waiting = 0
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+
+    def refill(self, now):
+        """
+        Add the tokens earned since the last update
+        """
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """
+        Take a token and a concurrency slot if both are free and return 0, otherwise
+        return the seconds to wait, None when only a release can free a slot
+        """
+        with self.condition:
+            now = time.monotonic()
+            self.refill(now)
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.active >= int(self.limit):
+                return None
+            if self.rate is not None and self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.active += 1
+            if self.rate is not None:
+                self.tokens -= 1
+            return 0
+
+    def acquire(self):
+        """
+        Wait for a token and a free concurrency slot
+        """
+        with self.condition:
+            self.waiting += 1
+            try:
+                while True:
+                    wait = self.try_acquire()
+                    if wait == 0:
+                        break
+                    self.condition.wait(wait)
+            finally:
+                self.waiting -= 1
+
+    async def acquire_async(self, poll=0.05):
+        """
+        acquire() for the asyncio client: the same tokens and slots, waited for with
+        asyncio.sleep so the event loop keeps running
+        """
+        with self.condition:
+            self.waiting += 1
+        try:
+            while True:
+                wait = self.try_acquire()
+                if wait == 0:
+                    return
+                await asyncio.sleep(poll if wait is None else min(wait, poll))
+        finally:
+            with self.condition:
+                self.waiting -= 1
+
+    def release(self, latency, status=None, retry_after=None):
+        """
+        Hand the slot back and adapt rate and concurrency to the response
+        """
+        with self.condition:
+            self.active -= 1
+            if status in (429, 503):
+                self.limit = max(1.0, self.limit / 2)
+                if self.rate is not None:
+                    self.rate = max(0.1, self.rate / 2)
+                if retry_after:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            elif latency > self.target_latency:
+                self.limit = max(1.0, self.limit - 1)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                if self.rate is not None and self.rate < self.configured_rate:
+                    self.rate = min(self.configured_rate, self.rate + 0.1)
+            self.condition.notify_all()
+
+    def stats(self):
+        """
+        Current rate, concurrency limit, requests in flight and queue depth
+        """
+        with self.condition:
+            return {'rate': self.rate, 'concurrency': int(self.limit), 'active': self.active, 'queue_depth': self.waiting}
+
+class RetryPolicy():
+    """
+    Exponential backoff with jitter for transient failures of idempotent requests
+    """
+    def __init__(self, attempts=4, backoff=0.5, max_backoff=30.0, jitter=0.5,
+                 statuses=(429, 500, 502, 503, 504), methods=('GET', 'HEAD')):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = statuses
+        self.methods = methods
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before retry number attempt (0 based)
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    @staticmethod
+    def retry_after(headers):
+        """
+        Seconds of a Retry-After header, None if it is not a number
+        """
+        try:
+            return float(headers.get('Retry-After', 0))
+        except ValueError:
+            return None
+
+class RequestStats():
+    """
+    Latency, bytes and status of every request, grouped by endpoint category
+    """
+    categories = (
+        ('/logText/progressiveText', 'console'),
+        ('/consoleText', 'console'),
+        ('/createItem', 'create item'),
+        ('/pluginManager/api/', 'plugin list'),
+        ('/computer/', 'nodes'),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        self.started = time.monotonic()
+
+    def category(self, method, url):
+        """
+        Endpoint category of a request url, e.g. job config, console, plugin list
+        """
+        path = requests.utils.urlparse(url).path
+        for marker, category in self.categories:
+            if marker in path:
+                return category
+        if method.upper() == 'POST':
+            return 'post'
+        kind = 'job' if '/job/' in path else 'view' if '/view/' in path else 'plugin' if '/plugin/' in path else 'controller'
+        if path.endswith('/config.xml'):
+            return kind + ' config'
+        if path.endswith('/api/json'):
+            return kind + ' api'
+        return 'other'
+
+    def record(self, method, url, started):
+        """
+        Start an entry, completed by update() as the status and body arrive
+        """
+        entry = {'method': method.upper(), 'url': url, 'category': self.category(method, url), 'status': None,
+                 'bytes': 0, 'seconds': 0.0, 'started': started - self.started}
+        with self.lock:
+            self.entries.append(entry)
+        return entry
+
+    def count_body(self, response, entry, started):
+        """
+        Count body bytes and download time as the response is read, streamed or not
+        """
+        iter_content = response.iter_content
+        def counted(*args, **kwargs):
+            for chunk in iter_content(*args, **kwargs):
+                entry['bytes'] += len(chunk)
+                entry['seconds'] = time.monotonic() - started
+                yield chunk
+        response.iter_content = counted
+
+    @staticmethod
+    def percentile(values, fraction):
+        """
+        Get the value at fraction of a sorted list
+        """
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def summary(self, slowest=10):
+        """
+        Per category count, bytes and p50/p95/p99 seconds, the slowest requests and throughput
+        """
+        with self.lock:
+            entries = list(self.entries)
+        categories = {}
+        for entry in entries:
+            categories.setdefault(entry['category'], []).append(entry)
+        report = {'requests': len(entries), 'bytes': sum(entry['bytes'] for entry in entries), 'categories': {}}
+        for category, items in sorted(categories.items()):
+            seconds = sorted(entry['seconds'] for entry in items)
+            report['categories'][category] = {
+                'requests': len(items),
+                'bytes': sum(entry['bytes'] for entry in items),
+                'errors': sum(1 for entry in items if entry['status'] is None or entry['status'] >= 400),
+                'p50': self.percentile(seconds, 0.50),
+                'p95': self.percentile(seconds, 0.95),
+                'p99': self.percentile(seconds, 0.99),
+            }
+        wall = max([entry['started'] + entry['seconds'] for entry in entries] or [0.0])
+        report['seconds'] = wall
+        report['throughput'] = report['bytes'] / wall if wall > 0 else 0.0
+        report['slowest'] = sorted(entries, key=lambda entry: entry['seconds'], reverse=True)[:slowest]
+        return report
+
+    def print_summary(self):
+        """
+        Print request count, bytes, errors and latency percentiles per endpoint category
+        """
+        report = self.summary()
+        print('{:<16} {:>8} {:>12} {:>7} {:>8} {:>8} {:>8}'.format('category', 'requests', 'bytes', 'errors', 'p50', 'p95', 'p99'))
+        for category, row in report['categories'].items():
+            print('{:<16} {:>8} {:>12} {:>7} {:>7.3f}s {:>7.3f}s {:>7.3f}s'.format(category, row['requests'], row['bytes'], row['errors'], row['p50'], row['p95'], row['p99']))
+        print('{} requests, {} bytes in {:.1f}s ({:.2f} MiB/s)'.format(report['requests'], report['bytes'], report['seconds'], report['throughput'] / 1024 / 1024))
+        for entry in report['slowest']:
+            print('  {:>7.3f}s {:>10} {} {} {}'.format(entry['seconds'], entry['bytes'], entry['status'], entry['method'], entry['url']))
+        return report
+
+    def export(self, file_name):
+        """
+        Write the summary and every request as JSON for dashboards
+        """
+        report = self.summary()
+        with self.lock:
+            report['entries'] = list(self.entries)
+        with open(file_name, 'w') as json_file:
+            json.dump(report, json_file, indent=4)
+        return report
+
+class RunMetrics():
+    """
+    Counters of one backup or restore run rendered in the Prometheus text format,
+    written for the node_exporter textfile collector or served on /metrics
+    """
+    item_types = ('job', 'folder', 'view', 'node', 'plugin')
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.lock = threading.Lock()
+        self.items = dict((kind, 0) for kind in self.item_types)
+        self.failures = dict((kind, 0) for kind in self.item_types)
+        self.bytes_written = 0
+        self.phases = {}
+        self.phase = None
+        self.phase_started = None
+        self.started = time.time()
+        self.archive_file = None
+        self.success = None
+        self.stats = None
+        self.server = None
+
+    def count(self, kind, ok):
+        """
+        Count a processed or failed item of type kind
+        """
+        with self.lock:
+            counters = self.items if ok else self.failures
+            counters[kind] = counters.get(kind, 0) + 1
+
+    def add_written(self, written):
+        """
+        Add bytes written to the backup
+        """
+        with self.lock:
+            self.bytes_written += written
+
+    def start_phase(self, name=None):
+        """
+        End the running phase and start timing name
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.phase is not None:
+                self.phases[self.phase] = self.phases.get(self.phase, 0.0) + now - self.phase_started
+            self.phase = name
+            self.phase_started = now
+
+    def render(self):
+        """
+        Metrics in the Prometheus text exposition format
+        """
+        labels = 'operation="{}"'.format(self.operation)
+        lines = []
+        def metric(name, kind, help_text, samples):
+            lines.append('# HELP jenkins_backup_{} {}'.format(name, help_text))
+            lines.append('# TYPE jenkins_backup_{} {}'.format(name, kind))
+            for extra, value in samples:
+                lines.append('jenkins_backup_{}{{{}}} {}'.format(name, labels + extra, value))
+        with self.lock:
+            items = sorted(self.items.items())
+            failures = sorted(self.failures.items())
+            phases = sorted(self.phases.items())
+            if self.phase is not None:
+                phases = sorted(dict(phases, **{self.phase: self.phases.get(self.phase, 0.0) + time.monotonic() - self.phase_started}).items())
+            bytes_written = self.bytes_written
+        metric('items_total', 'counter', 'Items processed by type', [(',type="{}"'.format(kind), value) for kind, value in items])
+        metric('item_failures_total', 'counter', 'Items that failed by type', [(',type="{}"'.format(kind), value) for kind, value in failures])
+        if self.stats is not None:
+            report = self.stats.summary(slowest=0)
+            metric('requests_total', 'counter', 'Controller requests by endpoint category', [(',category="{}"'.format(category), row['requests']) for category, row in report['categories'].items()])
+            metric('request_failures_total', 'counter', 'Failed controller requests by endpoint category', [(',category="{}"'.format(category), row['errors']) for category, row in report['categories'].items()])
+            metric('bytes_fetched_total', 'counter', 'Response bytes read from the controller', [('', report['bytes'])])
+        metric('bytes_written_total', 'counter', 'Bytes written to the backup', [('', bytes_written)])
+        metric('phase_duration_seconds', 'gauge', 'Wall time of each phase', [(',phase="{}"'.format(name), '{:.3f}'.format(seconds)) for name, seconds in phases])
+        metric('duration_seconds', 'gauge', 'Wall time of the run so far', [('', '{:.3f}'.format(time.time() - self.started))])
+        if self.archive_file is not None and os.path.exists(self.archive_file):
+            metric('archive_size_bytes', 'gauge', 'Size of the archive written', [('', os.path.getsize(self.archive_file))])
+        if self.success is not None:
+            metric('success', 'gauge', '1 if the run finished', [('', int(self.success))])
+        metric('last_run_timestamp_seconds', 'gauge', 'Start of the run', [('', int(self.started))])
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, file_name):
+        """
+        Atomically replace file_name so the textfile collector never reads a partial file
+        """
+        directory = os.path.dirname(os.path.abspath(file_name))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as metrics_file:
+            metrics_file.write(self.render())
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, file_name)
+
+    def serve(self, port):
+        """
+        Serve /metrics on port from a daemon thread for the lifetime of the run
+        """
+        metrics = self
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+        self.server = http.server.ThreadingHTTPServer(('', port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
+    def shutdown(self):
+        """
+        Stop the /metrics server
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+class Profiler():
+    """
+    cProfile (cpu) or tracemalloc (mem) around a backup or restore, worker threads included
+    """
+    modes = ('cpu', 'mem')
+
+    def __init__(self, mode, operation, top=50):
+        self.mode = mode
+        self.operation = operation
+        self.top = top
+        self.profiles = []
+        self.lock = threading.Lock()
+
+    def profile_thread(self, *args):
+        """
+        Give a new thread its own cProfile
+        """
+        # installed by threading.setprofile, swaps itself for a cProfile of the new thread
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        """
+        Start cProfile or tracemalloc
+        """
+        if self.mode == 'mem':
+            tracemalloc.start(25)
+            return self
+        if sys.version_info < (3, 12):
+            # before 3.12 a cProfile only sees the thread that enabled it
+            threading.setprofile(self.profile_thread)
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        profile.enable()
+        return self
+
+    def stop(self, dir_name):
+        """
+        Stop profiling and write the report(s) into dir_name, returns the file names
+        """
+        os.makedirs(dir_name, exist_ok=True)
+        base = os.path.join(dir_name, 'profile-{}-{}-{}'.format(self.operation, self.mode, time.strftime('%Y%m%dT%H%M%S')))
+        if self.mode == 'mem':
+            return self.stop_mem(base)
+        return self.stop_cpu(base)
+
+    def stop_cpu(self, base):
+        """
+        Merge the thread profiles into base.prof and a base.txt summary
+        """
+        threading.setprofile(None)
+        self.profiles[0].disable()
+        with self.lock:
+            profiles = list(self.profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                # thread finished before it made a call
+                pass
+        stats.dump_stats(base + '.prof')
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats('cumulative').print_stats(self.top)
+        stats.sort_stats('tottime').print_stats(self.top)
+        with open(base + '.txt', 'w') as report_file:
+            report_file.write(report.getvalue())
+        return [base + '.prof', base + '.txt']
+
+    def stop_mem(self, base):
+        """
+        Write the top allocation sites to base.txt
+        """
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        with open(base + '.txt', 'w') as report_file:
+            report_file.write('current {:.1f} MiB, peak {:.1f} MiB\n\n'.format(current / 1024 / 1024, peak / 1024 / 1024))
+            report_file.write('top {} allocation sites by line\n'.format(self.top))
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                report_file.write('{}\n'.format(stat))
+            report_file.write('\ntop 10 allocation sites by traceback\n')
+            for stat in snapshot.statistics('traceback')[:10]:
+                report_file.write('\n{} blocks, {:.1f} KiB\n'.format(stat.count, stat.size / 1024))
+                for line in stat.traceback.format():
+                    report_file.write(line + '\n')
+        return [base + '.txt']
+
+class JenkinsSession(requests.Session):
+    """
+    requests.Session that sends every call through a RateLimiter, retries transient
+    failures with a RetryPolicy and applies self.timeout; with stats set every
+    attempt is recorded in a RequestStats
+    """
+    def __init__(self, limiter=None, retry=None):
+        super().__init__()
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.timeout = None
+        self.stats = None
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the limiter, retrying idempotent methods on transient failures
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        # bodies not explicitly streamed are read while the limiter slot is held
+        kwargs.setdefault('stream', False)
+        attempts = self.retry.attempts if method.upper() in self.retry.methods else 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            response, retry_after = self.send_limited(method, url, **kwargs)
+            if isinstance(response, Exception):
+                if last_attempt or not isinstance(response, (requests.ConnectionError, requests.Timeout)):
+                    print('{} {} failed after {} attempt(s): {}'.format(method, url, attempt + 1, response))
+                    raise response
+            elif response.status_code not in self.retry.statuses or last_attempt:
+                if response.status_code in self.retry.statuses:
+                    print('{} {} failed after {} attempt(s): HTTP {}'.format(method, url, attempt + 1, response.status_code))
+                return response
+            else:
+                response.close()
+            time.sleep(self.retry.delay(attempt, retry_after))
+
+    def send_limited(self, method, url, **kwargs):
+        """
+        One attempt through the rate limiter, returns (response or exception, Retry-After seconds)
+        """
+        self.limiter.acquire()
+        started = time.monotonic()
+        status = None
+        retry_after = None
+        entry = None
+        if self.stats is not None:
+            entry = self.stats.record(method, url, started)
+        streamed = False
+        try:
+            response = super().request(method, url, **kwargs)
+            status = response.status_code
+            retry_after = RetryPolicy.retry_after(response.headers)
+            streamed = kwargs.get('stream')
+            if entry is not None:
+                entry['status'] = status
+                entry['seconds'] = time.monotonic() - started
+                if streamed:
+                    self.stats.count_body(response, entry, started)
+                else:
+                    entry['bytes'] = len(response.content)
+            if streamed:
+                self.release_after_body(response, started, status, retry_after)
+            return response, retry_after
+        except requests.RequestException as e:
+            if entry is not None:
+                entry['seconds'] = time.monotonic() - started
+            return e, None
+        finally:
+            if not streamed:
+                self.limiter.release(time.monotonic() - started, status, retry_after)
+
+    def release_after_body(self, response, started, status, retry_after):
+        """
+        Hold the limiter slot of a streamed response until its body is read or it is closed,
+        so long downloads stay under the concurrency cap and their latency covers the body
+        """
+        lock = threading.Lock()
+        released = []
+        def release():
+            with lock:
+                if released:
+                    return
+                released.append(True)
+            self.limiter.release(time.monotonic() - started, status, retry_after)
+        iter_content = response.iter_content
+        close = response.close
+        def iter_content_then_release(*args, **kwargs):
+            try:
+                for chunk in iter_content(*args, **kwargs):
+                    yield chunk
+            finally:
+                release()
+        def close_then_release():
+            try:
+                close()
+            finally:
+                release()
+        response.iter_content = iter_content_then_release
+        response.close = close_then_release
+
+class Checkpoint():
+    """
+    Append-only record of finished work items so an interrupted run can resume
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(file_name):
+            with open(file_name, 'r') as checkpoint_file:
+                self.done = set(line.rstrip('\n') for line in checkpoint_file if line.endswith('\n'))
+        self.checkpoint_file = open(file_name, 'a')
+
+    def is_done(self, key):
+        """
+        Tell whether key finished in an earlier run
+        """
+        with self.lock:
+            return key in self.done
+
+    def mark(self, key):
+        """
+        Record a finished item
+        """
+        with self.lock:
+            if key not in self.done:
+                self.done.add(key)
+                self.checkpoint_file.write(key + '\n')
+                self.checkpoint_file.flush()
+
+    def clear(self):
+        """
+        Drop the checkpoint once the run finished
+        """
+        with self.lock:
+            self.checkpoint_file.close()
+            if os.path.exists(self.file_name):
+                os.remove(self.file_name)
+
+@dataclasses.dataclass
+class BackupItem:
+    """
+    One unit of backup work flowing through BackupPipeline
+    """
+    kind: str
+    name: str
+    folder: str = ''
+    # folders keep kind 'job' so their checkpoint keys stay job:<path>
+    is_folder: bool = False
+
+class BackupPipeline():
+    """
+    Streaming backup: discovery feeds fetch workers, fetch workers feed one sink,
+    joined by bounded queues so memory stays flat and network and disk work overlap
+    """
+    def __init__(self, jenkins, workers=1, queue_size=None):
+        self.jenkins = jenkins
+        self.workers = max(1, workers)
+        if queue_size is None:
+            queue_size = self.workers * 4
+        self.fetch_queue = queue.Queue(maxsize=queue_size)
+        self.sink_queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+
+    def count(self, item, ok):
+        """
+        Record the outcome of an item once, in the pipeline totals and the run metrics
+        """
+        with self.lock:
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+        if self.jenkins.metrics is not None:
+            self.jenkins.metrics.count('folder' if item.is_folder else item.kind, ok)
+
+    def fetch_loop(self):
+        """
+        Fetch worker: take items off the fetch queue and pass their configs to the sink
+        """
+        while True:
+            item = self.fetch_queue.get()
+            if item is None:
+                return
+            try:
+                content = self.jenkins.fetch_backup_item(item)
+            except Exception as e:
+                print(e)
+                content = None
+            if content is None:
+                self.count(item, False)
+            else:
+                self.sink_queue.put((item, content))
+
+    def sink_loop(self):
+        """
+        Single writer: store fetched configs so details.json is only written from one thread
+        """
+        while True:
+            entry = self.sink_queue.get()
+            if entry is None:
+                return
+            item, content = entry
+            try:
+                self.jenkins.store_backup_item(item, content)
+                self.count(item, True)
+            except Exception as e:
+                print(e)
+                self.count(item, False)
+
+    def run(self, items):
+        """
+        Push items through the pipeline, put() blocks discovery while the fetch queue is full
+        """
+        fetchers = [threading.Thread(target=self.fetch_loop, daemon=True) for _ in range(self.workers)]
+        sink = threading.Thread(target=self.sink_loop, daemon=True)
+        for thread in fetchers + [sink]:
+            thread.start()
+        try:
+            for item in items:
+                self.fetch_queue.put(item)
+        finally:
+            for _ in fetchers:
+                self.fetch_queue.put(None)
+            for thread in fetchers:
+                thread.join()
+            self.sink_queue.put(None)
+            sink.join()
+        print('pipeline: {} items backed up, {} failed'.format(self.done, self.failed))
+        return self.failed == 0
+
 class MyJenkins():
     """
     Class to backup and restore jenkins jobs, plugins and configuration
     """
+    # Concurrent requests allowed against one controller, shared by every
+    # MyJenkins instance in the process that talks to the same url
+    max_workers_per_controller = 16
+    controller_slots = {}
+    controller_slots_lock = threading.Lock()
+
     def __init__(self, args):
 
         self.loggers=False
@@ -73,12 +1499,97 @@ class MyJenkins():
             self.zip_file = os.path.join(self.zip_dir, 'backup.zip') 
         else:
             self.zip_file = os.path.join(self.zip_dir, args.zip)
-        self.session = requests.Session()
+        self.session = JenkinsSession()
         self.session.auth = (self.username, self.token)
         self.session.headers.update({'Content-Type':'text/xml'})
         self.session.verify = False
         self.session.stream = True
         self.session.timeout = 30
+        if args.workers is None:
+            self.workers = 1
+        else:
+            self.workers = max(1, args.workers)
+        if args.max_workers is None:
+            self.max_workers = self.max_workers_per_controller
+        else:
+            self.max_workers = max(1, args.max_workers)
+        if args.target_latency is None:
+            target_latency = 2.0
+        else:
+            target_latency = args.target_latency
+        self.session.limiter = RateLimiter(args.rate, self.max_workers, target_latency)
+        if args.retries is not None:
+            self.session.retry.attempts = max(1, args.retries + 1)
+        self.checkpoint = None
+        self.resume = args.resume
+        self.queue_size = args.queue_size
+        self.perf_report = args.perf_report
+        self.perf_json = args.perf_json
+        self.selection = None
+        if args.include or args.exclude or args.types:
+            self.selection = Selection(args.include, args.exclude, args.types)
+        self.restore_from_archive = False
+        self.reconcile = args.reconcile
+        self.reconcile_lock = threading.Lock()
+        self.reconciled = {}
+        self.live_plugins = None
+        self.catalog = args.catalog
+        self.profile = args.profile
+        self.profile_dir = args.profile_dir
+        self.profiler = None
+        self.metrics_file = args.metrics_file
+        self.metrics_port = args.metrics_port
+        self.metrics = None
+        if self.perf_report or self.perf_json or self.metrics_file or self.metrics_port:
+            self.session.stats = RequestStats()
+        self.history_builds = args.builds
+        self.history_since = None
+        if args.since is not None:
+            self.history_since = int(time.mktime(time.strptime(args.since, '%Y-%m-%d')) * 1000)
+        self.history_enabled = bool(self.history_builds) or self.history_since is not None
+        # one pool for every build console download, created on first use
+        self.build_executor = None
+        self.build_executor_lock = threading.Lock()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(10, min(self.workers, self.max_workers)))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.json_lock = threading.Lock()
+        self.manifests = {}
+        self.manifest_journal = args.manifest_journal
+        self.inventory = None
+        self.inventory_failed = None
+        self.inventory_lock = threading.Lock()
+        self.inventory_depth = 6
+        self.log_chunk_size = 1024 * 1024
+        self.log_transfers = []
+        self.incremental_logs = args.incremental_logs
+        self.incremental = args.incremental
+        self.previous_hashes = None
+        self.hash_lock = threading.Lock()
+        # Hashes keys written by this run, and the keys a full run no longer found
+        self.written_keys = set()
+        self.removed_keys = []
+        self.previous_chain = None
+        self.started = time.strftime('%Y%m%dT%H%M%S')
+        self.stream_archive = args.stream_archive
+        if args.compression is None:
+            self.compression = zipfile.ZIP_DEFLATED
+        else:
+            self.compression = COMPRESSION_CODECS[args.compression]
+        self.compression_level = args.compression_level
+        if args.compression_workers is None:
+            self.compression_workers = 1
+        else:
+            self.compression_workers = max(1, args.compression_workers)
+        self.archive = None
+        if args.store is None:
+            self.store = None
+        else:
+            self.store = ContentStore(args.store)
+        if args.keep_snapshots is None:
+            self.keep_snapshots = 30
+        else:
+            self.keep_snapshots = args.keep_snapshots
         
         self.folder_dir=self.backup_dir+'/folder'
         self.folder_jobs_dir = self.folder_dir + '/jobs'
@@ -93,6 +1604,84 @@ class MyJenkins():
         self.views_log_dir=self.views_dir+'/log'
         self.nodes_log_dir=self.nodes_dir+'/log'
         self.folder_jobs_log_dir=self.folder_jobs_dir+'/log'
+        self.folder_log_dir=self.folder_dir+'/log'
+
+    def inventory_tree(self, depth):
+        """
+        Build the tree= query for jobs nested depth folders deep
+        """
+        fields = 'name,url,lastBuild[number]'
+        tree = 'jobs[' + fields + ']'
+        for _ in range(depth - 1):
+            tree = 'jobs[' + fields + ',' + tree + ']'
+        return tree
+
+    def parse_inventory_items(self, jobs, parent_path='', depth=1):
+        """
+        Turn a tree query jobs list into InventoryItem objects, fetching folders below the query depth
+        """
+        items = []
+        for job in jobs:
+            path = parent_path + '/' + job['name'] if parent_path else job['name']
+            is_folder = job.get('_class') == FOLDER_CLASS or 'jobs' in job
+            last_build = job['lastBuild']['number'] if job.get('lastBuild') else None
+            item = InventoryItem(job['name'], path, job.get('_class', ''), job.get('url', ''), last_build, is_folder)
+            if is_folder:
+                if 'jobs' in job:
+                    item.children = self.parse_inventory_items(job['jobs'], path, depth + 1)
+                else:
+                    # folder sits at the query depth limit, fetch the next slice of the tree
+                    try:
+                        response = self.session.get(self.url + job_url_path(path) + '/api/json?tree=' + self.inventory_tree(self.inventory_depth))
+                        item.children = self.parse_inventory_items(response.json()['jobs'], path, depth + 1)
+                    except Exception as e:
+                        # keep the rest of the inventory, this folder is listed live when walked
+                        print('{}: {}'.format(path, e))
+                        item.complete = False
+            items.append(item)
+        return items
+
+    def refresh_inventory(self):
+        """
+        Fetch the whole controller tree in three requests: jobs and views, nodes, plugins.
+        Nodes or plugins that fail to load are left as None and fetched per call.
+        On failure the attempt is remembered so getters fall back to their own endpoints
+        instead of retrying the inventory on every call
+        """
+        self.inventory_failed = None
+        try:
+            response = self.session.get(self.url + '/api/json?tree=' + self.inventory_tree(self.inventory_depth) + ',views[name,url]')
+            data = response.json()
+            jobs = self.parse_inventory_items(data['jobs'])
+            views = data.get('views', [])
+        except Exception as e:
+            print('inventory unavailable, falling back to per item requests: {}'.format(e))
+            self.inventory = None
+            self.inventory_failed = time.time()
+            return None
+        nodes = None
+        plugins = None
+        try:
+            response = self.session.get(self.url + '/computer/api/json?tree=computer[displayName]')
+            nodes = response.json()['computer']
+        except Exception as e:
+            print(e)
+        try:
+            response = self.session.get(self.url + '/pluginManager/api/json?tree=plugins[shortName,version]')
+            plugins = response.json()['plugins']
+        except Exception as e:
+            print(e)
+        self.inventory = Inventory(jobs, views, nodes, plugins, time.time())
+        return self.inventory
+
+    def get_inventory(self):
+        """
+        Get the cached inventory, fetching it on first use; None after a failed fetch
+        """
+        with self.inventory_lock:
+            if self.inventory is None and self.inventory_failed is None:
+                self.refresh_inventory()
+            return self.inventory
 
     def get_job(self, job_name):
         """
@@ -128,11 +1717,34 @@ class MyJenkins():
             pass
         return view
 
+    def get_manifest(self, file_name):
+        """
+        Get the in-memory manifest for file_name
+        """
+        with self.json_lock:
+            if file_name not in self.manifests:
+                self.manifests[file_name] = BackupManifest(file_name, self.manifest_journal)
+            return self.manifests[file_name]
+
+    def flush_manifests(self):
+        """
+        Write every manifest to disk
+        """
+        with self.json_lock:
+            manifests = list(self.manifests.values())
+        for manifest in manifests:
+            try:
+                manifest.flush()
+            except Exception as e:
+                print(e)
+
     def read_json_file(self, file_name, parentkey):
         
         """
         Read json file
         """
+        if file_name in self.manifests:
+            return self.manifests[file_name].get(parentkey)
         try:
             with open(file_name, 'r') as json_file:
                 json_data = json.load(json_file)
@@ -142,23 +1754,224 @@ class MyJenkins():
     
     def write_json_file(self, file_name,parentkey, key, value):
         """
-        Write json file
+        Write json file, kept in memory until flush_manifests
+        """
+        self.get_manifest(file_name).add(parentkey, key, value)
+
+    def folder_job_file(self, folder_name, job_name):
+        """
+        Backup path of a job or folder nested in folder_name, mirroring the folder path
+        under the folder jobs directory so same-named items in different folders stay apart
+        """
+        return os.path.join(self.folder_jobs_dir, *folder_name.split('/'), job_name + '.xml')
+
+    def write_backup_file(self, file_name, content):
+        """
+        Write a config into the backup directory and record its sha256 under Hashes in details.json.
+        In incremental mode a config whose hash matches the previous backup is not written.
+        With a content store the config goes into the store instead of the backup directory.
+        Returns True if the file was written
+        """
+        key = os.path.relpath(file_name, self.backup_dir).replace(os.sep, '/')
+        data = content.encode('utf-8')
+        with self.hash_lock:
+            self.written_keys.add(key)
+        if self.store is not None:
+            digest = self.store.put(key, data)
+            self.write_json_file("details.json", "Hashes", key, digest)
+            return True
+        digest = hashlib.sha256(data).hexdigest()
+        changed = self.load_previous_hashes().get(key) != digest
+        self.write_json_file("details.json", "Hashes", key, digest)
+        if self.incremental and not changed:
+            return False
+        if self.metrics is not None:
+            self.metrics.add_written(len(data))
+        if self.archive is not None:
+            self.archive.writestr(self.archive_member_name(file_name), data)
+            return True
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, 'w') as item_file:
+            item_file.write(content)
+        return True
+
+    def load_previous_hashes(self):
+        """
+        Get the Hashes of the previous backup, read from details.json before this run adds to it
+        """
+        with self.hash_lock:
+            if self.previous_hashes is None:
+                self.previous_hashes = self.read_json_file("details.json", "Hashes") or {}
+            return self.previous_hashes
+
+    def archive_name(self, zip_file_name=None):
+        """
+        Get the archive this run goes into, <base>-incr-<timestamp>.zip for an incremental run
+        """
+        if zip_file_name is None:
+            zip_file_name = self.zip_file
+        if self.incremental and self.load_previous_hashes() and os.path.exists(zip_file_name):
+            return os.path.splitext(zip_file_name)[0] + '-incr-' + self.started + '.zip'
+        return zip_file_name
+
+    def record_removed_items(self):
+        """
+        After a successful full run, drop the Hashes of items that were not backed up again
+        (deleted on the controller) and remember them as tombstones for snapshot.json
+        """
+        hashes = self.read_json_file("details.json", "Hashes") or {}
+        with self.hash_lock:
+            # only the sections this run covered, e.g. nodes saved by another mode stay
+            sections = set(key.split('/', 1)[0] for key in self.written_keys)
+            self.removed_keys = sorted(key for key in set(hashes) - self.written_keys if key.split('/', 1)[0] in sections)
+        manifest = self.get_manifest("details.json")
+        for key in self.removed_keys:
+            manifest.remove("Hashes", key)
+        return self.removed_keys
+
+    def snapshot_info(self, zip_file_name, archive):
+        """
+        Get snapshot.json content of an incremental-mode archive, with the keys removed since
+        the previous run so layering the chain does not bring deleted items back
+        """
+        return json.dumps({'type': 'full' if archive == zip_file_name else 'incremental', 'base': zip_file_name, 'created': self.started,
+                           'removed': self.removed_keys, 'hashes': self.read_json_file("details.json", "Hashes") or {}}, indent=2)
+
+    @staticmethod
+    def read_snapshot_info(zip_file_name):
+        """
+        Get the snapshot.json of an archive and the top directory holding it, ({}, None) without one
+        """
+        try:
+            with zipfile.ZipFile(zip_file_name, 'r') as zip_file:
+                for info in zip_file.infolist():
+                    if info.filename.endswith('/snapshot.json') and info.filename.count('/') == 1:
+                        return json.loads(zip_file.read(info)), info.filename.split('/')[0]
+        except (zipfile.BadZipFile, ValueError) as e:
+            print('{}: {}'.format(zip_file_name, e))
+        return {}, None
+
+    def open_archive(self, zip_file_name=None):
+        """
+        Start writing this run straight into its zip archive
+        """
+        if zip_file_name is None:
+            zip_file_name = self.zip_file
+        os.makedirs(os.path.dirname(os.path.abspath(zip_file_name)), exist_ok=True)
+        self.archive = ArchiveWriter(self.archive_name(zip_file_name), self.compression, self.compression_level)
+        return self.archive
+
+    def catalog_archive(self, zip_file_name):
+        """
+        Index a finished archive in the --catalog database
         """
-        json_data=None
-        if not os.path.exists(file_name) or os.stat(file_name).st_size == 0:
-            with open(file_name, 'w') as json_file:
-                json.dump({}, json_file)
+        if not self.catalog or not os.path.exists(zip_file_name):
+            return None
+        catalog = Catalog(self.catalog)
+        try:
+            count = catalog.index_archive(zip_file_name, time.strftime('%Y-%m-%dT%H:%M:%S', time.strptime(self.started, '%Y%m%dT%H%M%S')))
+        finally:
+            catalog.close()
+        print('{}: {} items indexed in {}'.format(zip_file_name, count, self.catalog))
+        return count
+
+    def close_archive(self, zip_file_name=None):
+        """
+        Finish the streamed archive
+        """
+        if zip_file_name is None:
+            zip_file_name = self.zip_file
+        if self.incremental:
+            self.archive.writestr(self.archive_member_name(os.path.join(self.backup_dir, 'snapshot.json')), self.snapshot_info(zip_file_name, self.archive.zip_file_name))
+        self.archive.close()
+        if self.metrics is not None:
+            self.metrics.archive_file = self.archive.zip_file_name
+        self.catalog_archive(self.archive.zip_file_name)
+        self.archive = None
+
+    def prepare_archive(self, zip_file_name=None):
+        """
+        Get the archive to compress the backup directory into.
+        In incremental mode, once a full base exists, every run gets its own
+        <base>-incr-<timestamp>.zip holding only changed items plus snapshot.json
+        """
+        if zip_file_name is None:
+            zip_file_name = self.zip_file
+        if not self.incremental:
+            return zip_file_name
+        archive = self.archive_name(zip_file_name)
+        self.create_dir(self.backup_dir)
+        with open(os.path.join(self.backup_dir, 'snapshot.json'), 'w') as snapshot_file:
+            snapshot_file.write(self.snapshot_info(zip_file_name, archive))
+        return archive
+
+    def incremental_chain(self, zip_file_name=None):
+        """
+        Get the full base archive followed by the incrementals taken after it, oldest first.
+        Archives are ordered by the run time recorded in their snapshot.json (file mtime only
+        for archives without one), so copied or touched files keep their place
+        """
+        if zip_file_name is None:
+            zip_file_name = self.zip_file
+        if not os.path.exists(zip_file_name):
+            return []
+        def created(name):
+            info, root = self.read_snapshot_info(name)
+            return info.get('created') or time.strftime('%Y%m%dT%H%M%S', time.localtime(os.path.getmtime(name)))
+        base_created = created(zip_file_name)
+        incrementals = sorted((created(name), name) for name in glob.glob(os.path.splitext(zip_file_name)[0] + '-incr-*.zip'))
+        return [zip_file_name] + [name for name_created, name in incrementals if name_created >= base_created]
+
+    def decompress_incremental_chain(self, zip_file_name=None):
+        """
+        Layer each incremental over the full base so the newest copy of every item wins,
+        deleting the items an incremental records as removed
+        """
+        chain = self.incremental_chain(zip_file_name)
+        for archive in chain:
+            self.decompress_all_files_in_dir(archive)
+            info, root = self.read_snapshot_info(archive)
+            for key in info.get('removed', []):
+                # same place decompress_all_files_in_dir extracts to
+                file_name = os.path.join(os.path.dirname(os.path.dirname(archive)), root, *key.split('/'))
+                if os.path.exists(file_name):
+                    os.remove(file_name)
+        return chain
+
+    def write_manifest_to_backup(self, file_name="details.json"):
+        """
+        Put a copy of the manifest into the backup so every archive describes itself
+        """
+        manifest = self.get_manifest(file_name)
+        with manifest.lock:
+            data = json.dumps(manifest.entries, indent=2)
+        target = os.path.join(self.backup_dir, os.path.basename(file_name))
+        if self.archive is not None:
+            self.archive.writestr(self.archive_member_name(target), data)
         else:
-            try:        
-                with open(file_name, 'r') as json_file:
-                    json_data = json.load(json_file)
-                json_data[parentkey][key]=value
-            except:
-                json_data[parentkey]={}
-                json_data[parentkey][key]=value
-            finally:
-                with open(file_name, 'w') as json_file:
-                    json.dump(json_data, json_file) 
+            self.create_dir(self.backup_dir)
+            with open(target, 'w') as json_file:
+                json_file.write(data)
+
+    def read_backup_manifest(self, parentkey, file_name="details.json"):
+        """
+        Read parentkey from the manifest inside the backup, falling back to the local one
+        """
+        data = self.read_json_file(os.path.join(self.backup_dir, os.path.basename(file_name)), parentkey)
+        if data is None:
+            data = self.read_json_file(file_name, parentkey)
+        return data
+
+    def commit_store_snapshot(self):
+        """
+        Commit the content store snapshot of this run and prune old snapshots
+        """
+        if self.store is None:
+            return None
+        name = self.store.commit()
+        removed = self.store.prune(self.keep_snapshots)
+        print('snapshot {} committed, {} unreferenced objects pruned'.format(name, removed))
+        return name
 
     def remove_all_files_in_dir(self, dir_name):
         """
@@ -245,16 +2058,139 @@ class MyJenkins():
         if not os.path.exists(dir_name):
             #create directory
             os.makedirs(dir_name)
-        try:
-            zip_file = zipfile.ZipFile(zip_file_name, 'w', zipfile.ZIP_DEFLATED)
-            for root, dirs, files in os.walk(dir_name):
-                for file in files:
-                    zip_file.write(os.path.join(root, file), os.path.relpath(os.path.join(root, file), os.path.join(dir_name, '..')))
-            zip_file.close()
+        started = time.time()
+        try:
+            if self.compression_workers <= 1 or not self.compress_all_files_in_dir_parallel(zip_file_name, dir_name, self.compression_workers):
+                zip_file = zipfile.ZipFile(zip_file_name, 'w', self.compression, compresslevel=self.compression_level)
+                for root, dirs, files in os.walk(dir_name):
+                    for file in files:
+                        zip_file.write(os.path.join(root, file), os.path.relpath(os.path.join(root, file), os.path.join(dir_name, '..')))
+                zip_file.close()
+            self.report_compression(zip_file_name, time.time() - started)
         except Exception as e:
             print(e)
             pass
 
+    def report_compression(self, zip_file_name, elapsed):
+        """
+        Print compression ratio and time of an archive
+        """
+        with zipfile.ZipFile(zip_file_name, 'r') as zip_file:
+            original = sum(info.file_size for info in zip_file.infolist())
+        compressed = os.path.getsize(zip_file_name)
+        ratio = compressed / original if original else 1.0
+        print('{}: {} -> {} bytes, ratio {:.3f}, {:.2f}s'.format(os.path.basename(zip_file_name), original, compressed, ratio, elapsed))
+        return {'original': original, 'compressed': compressed, 'ratio': ratio, 'seconds': elapsed}
+
+    def compress_all_files_in_dir_parallel(self, zip_file_name, dir_name, workers):
+        """
+        Compress members on several threads (zlib, bz2 and lzma release the GIL), each
+        into a spool, and append them to zip_file_name as they finish with a ZipAssembler.
+        Returns False if that fails or the central directory does not list every member
+        with its CRC and size, the caller then compresses on one thread
+        """
+        members = []
+        for root, dirs, files in os.walk(dir_name):
+            for file in files:
+                members.append((os.path.join(root, file), os.path.relpath(os.path.join(root, file), os.path.join(dir_name, '..'))))
+        # largest first so the longest compressions start early
+        members.sort(key=lambda member: os.path.getsize(member[0]), reverse=True)
+        expected = {}
+        try:
+            assembler = ZipAssembler(zip_file_name)
+            try:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(compress_member, file_name, arcname, self.compression, self.compression_level) for file_name, arcname in members]
+                    for future in concurrent.futures.as_completed(futures):
+                        info, payload = future.result()
+                        with payload:
+                            assembler.add(info, payload)
+                        expected[info.filename] = (info.CRC, info.file_size)
+            finally:
+                assembler.close()
+        except Exception as e:
+            print('{}: parallel compression failed: {}'.format(zip_file_name, e))
+            return False
+        if not self.validate_archive(zip_file_name, expected):
+            print('{}: archive failed validation, compressing on one thread'.format(zip_file_name))
+            return False
+        return True
+
+    def validate_archive(self, zip_file_name, expected):
+        """
+        Check from the central directory alone, without decompressing anything, that an
+        archive lists exactly the expected members; expected maps name to (CRC, size)
+        """
+        try:
+            with zipfile.ZipFile(zip_file_name, 'r') as zip_file:
+                return {info.filename: (info.CRC, info.file_size) for info in zip_file.infolist()} == expected
+        except Exception as e:
+            print('{}: {}'.format(zip_file_name, e))
+            return False
+
+    def compression_report(self, dir_name, codecs=None, compresslevel=None):
+        """
+        Compress dir_name with every codec into a temporary file and print ratio and time per codec
+        """
+        if codecs is None:
+            codecs = list(COMPRESSION_CODECS)
+        original = sum(os.path.getsize(os.path.join(root, file)) for root, dirs, files in os.walk(dir_name) for file in files)
+        report = {}
+        for codec in codecs:
+            started = time.time()
+            with tempfile.TemporaryFile() as target:
+                with zipfile.ZipFile(target, 'w', COMPRESSION_CODECS[codec], compresslevel=compresslevel) as zip_file:
+                    for root, dirs, files in os.walk(dir_name):
+                        for file in files:
+                            zip_file.write(os.path.join(root, file), os.path.relpath(os.path.join(root, file), os.path.join(dir_name, '..')))
+                compressed = target.tell()
+            elapsed = time.time() - started
+            report[codec] = {'original': original, 'compressed': compressed, 'ratio': compressed / original if original else 1.0, 'seconds': elapsed}
+            print('{:8} ratio {:.3f}  {:.2f}s  {} -> {} bytes'.format(codec, report[codec]['ratio'], elapsed, original, compressed))
+        return report
+
+    def read_archive_member(self, file_name, zip_file_name=None):
+        """
+        Read one backup file straight out of the archive. Only the central directory
+        and that member are read, whatever the size of the archive
+        """
+        if zip_file_name is None:
+            zip_file_name = self.zip_file
+        with zipfile.ZipFile(zip_file_name, 'r') as zip_file:
+            return zip_file.read(self.archive_member_name(file_name)).decode('utf-8')
+
+    def restore_job_from_archive(self, job_name):
+        """
+        Restore a top level job, or a job found in FolderJobs of the archived details.json
+        (job_name may also be a folder path), from the archive without extracting it
+        """
+        with zipfile.ZipFile(self.zip_file, 'r') as zip_file:
+            names = set(zip_file.namelist())
+            member = self.archive_member_name(os.path.join(self.jobs_dir, job_name + '.xml'))
+            if member in names:
+                return self.create_job(job_name, zip_file.read(member).decode('utf-8'))
+            manifest_member = self.archive_member_name(os.path.join(self.backup_dir, 'details.json'))
+            folder_jobs = json.loads(zip_file.read(manifest_member)).get('FolderJobs', {}) if manifest_member in names else {}
+            folder_name, _, name = job_name.rpartition('/')
+            if not folder_name:
+                # a bare name is looked up among the nested paths, it must be unambiguous
+                paths = [path for path in folder_jobs if path.rpartition('/')[2] == name and '/' in path]
+                if len(paths) > 1:
+                    print('{}: found in several folders, give the folder path: {}'.format(job_name, ', '.join(sorted(paths))))
+                    return False
+                folder_name = folder_jobs[paths[0]] if paths else folder_jobs.get(name)
+            if folder_name is None:
+                print('{}: not found in {}'.format(job_name, self.zip_file))
+                return False
+            member = self.archive_member_name(self.folder_job_file(folder_name, name))
+            if member not in names:
+                # flat layout of older backups, keyed by bare name
+                member = self.archive_member_name(os.path.join(self.folder_jobs_dir, name + '.xml'))
+                if folder_jobs.get(name) != folder_name or member not in names:
+                    print('{}: not found in {}'.format(job_name, self.zip_file))
+                    return False
+            return self.create_item_in_folder(folder_name, name, None, zip_file.read(member).decode('utf-8'))
+
     def decompress_all_files_in_dir(self, zip_file_name, dir_name=None):
         """
         Decompress all files in a directory
@@ -306,7 +2242,12 @@ class MyJenkins():
         self.views_log_dir=self.views_dir+'/log'
         self.nodes_log_dir=self.nodes_dir+'/log'
         self.folder_jobs_log_dir=self.folder_jobs_dir+'/log'
+        self.folder_log_dir=self.folder_dir+'/log'
 
+        if self.stream_archive:
+            # no staging directory, items go straight into the archive
+            self.open_archive()
+            return
         self.create_dir(self.backup_dir)
         self.create_dir(self.zip_dir)
         self.create_dir(self.jobs_dir)
@@ -322,6 +2263,7 @@ class MyJenkins():
         self.create_dir(self.views_log_dir)
         self.create_dir(self.nodes_log_dir)
         self.create_dir(self.folder_jobs_log_dir)
+        self.create_dir(self.folder_log_dir)
 
 
     def delete_backup_dir(self):
@@ -481,6 +2423,9 @@ class MyJenkins():
         """
         Get all nodes
         """
+        inventory = self.get_inventory()
+        if inventory is not None and inventory.nodes is not None:
+            return inventory.nodes
         nodes = []
         try:
             response = self.session.get(self.url + '/computer/api/json')
@@ -489,6 +2434,148 @@ class MyJenkins():
             pass
         return nodes
 
+    def stream_to_files(self, url, file_names):
+        """
+        Stream a response body to one or more files chunk by chunk, memory stays at log_chunk_size
+        Returns the number of bytes written or None
+        """
+        started = time.time()
+        with self.session.get(url, stream=True, timeout=self.session.timeout) as response:
+            if not response.ok:
+                return None
+            written = self.copy_response_to_files(response, file_names)
+        self.report_log_transfer(file_names[0], written, time.time() - started)
+        return written
+
+    def copy_response_to_files(self, response, file_names, start=0, source=None):
+        """
+        Copy a streamed response into files, appending after start bytes already there.
+        With a streamed archive the members are written into it, the first start bytes
+        coming from the previous archive source.
+        Returns the number of bytes copied from the response
+        """
+        chunks = response.iter_content(chunk_size=self.log_chunk_size)
+        if self.archive is not None:
+            if start:
+                chunks = itertools.chain(self.previous_member_chunks(file_names[0], source), chunks)
+            return self.archive.write_from([self.archive_member_name(file_name) for file_name in file_names], chunks) - start
+        written = 0
+        files = [open(file_name, 'ab' if start else 'wb') for file_name in file_names]
+        try:
+            for chunk in chunks:
+                for file_to_write in files:
+                    file_to_write.write(chunk)
+                written += len(chunk)
+        finally:
+            for file_to_write in files:
+                file_to_write.close()
+        return written
+
+    def archive_member_name(self, file_name):
+        """
+        Name of a backup file inside the zip written by compress_all_files_in_dir
+        """
+        return os.path.relpath(file_name, os.path.join(self.backup_dir, '..')).replace(os.sep, '/')
+
+    def previous_archive_with(self, file_name):
+        """
+        Get the newest earlier archive holding file_name: under --incremental the last
+        archive of the chain that has it, otherwise the base archive
+        """
+        if not self.incremental:
+            return self.zip_file
+        with self.hash_lock:
+            if self.previous_chain is None:
+                self.previous_chain = self.incremental_chain()
+            chain = self.previous_chain
+        member = self.archive_member_name(file_name)
+        for zip_file_name in reversed(chain):
+            try:
+                with zipfile.ZipFile(zip_file_name, 'r') as zip_file:
+                    zip_file.getinfo(member)
+                return zip_file_name
+            except (KeyError, OSError, zipfile.BadZipFile):
+                continue
+        return self.zip_file
+
+    def seed_from_archive(self, file_name, size, source=None):
+        """
+        Copy file_name out of the previous backup archive source if it holds exactly size bytes
+        """
+        if source is None:
+            source = self.zip_file
+        if self.archive is None and os.path.exists(file_name) and os.path.getsize(file_name) == size:
+            return True
+        try:
+            with zipfile.ZipFile(source, 'r') as zip_file:
+                info = zip_file.getinfo(self.archive_member_name(file_name))
+                if info.file_size != size:
+                    return False
+                if self.archive is not None:
+                    # copied into the streamed archive by copy_response_to_files
+                    return True
+                with zip_file.open(info) as source, open(file_name, 'wb') as target:
+                    shutil.copyfileobj(source, target, self.log_chunk_size)
+            return True
+        except:
+            return False
+
+    def previous_member_chunks(self, file_name, source=None):
+        """
+        Yield file_name from the previous archive source in log_chunk_size chunks
+        """
+        with zipfile.ZipFile(source or self.zip_file, 'r') as zip_file:
+            with zip_file.open(self.archive_member_name(file_name)) as source:
+                for chunk in iter(lambda: source.read(self.log_chunk_size), b''):
+                    yield chunk
+
+    def stream_log_increment(self, job_name, build_number, file_names):
+        """
+        Fetch only the bytes of a progressiveText log added since the last backup.
+        The previous X-Text-Size offset is kept under LogOffsets in details.json and the
+        already fetched part is taken from the previous archive.
+        Returns the number of bytes fetched or None
+        """
+        key = os.path.relpath(file_names[0], self.backup_dir).replace(os.sep, '/')
+        offsets = self.read_json_file("details.json", "LogOffsets") or {}
+        previous = offsets.get(key)
+        start = 0
+        source = None
+        if previous and previous['build'] == build_number:
+            source = self.previous_archive_with(file_names[0])
+            if all(self.seed_from_archive(file_name, previous['offset'], source) for file_name in file_names):
+                start = previous['offset']
+        started = time.time()
+        url = self.url + job_url_path(job_name) + '/' + str(build_number) + '/logText/progressiveText'
+        while True:
+            with self.session.get(url + '?start=' + str(start), stream=True, timeout=self.session.timeout) as response:
+                if not response.ok:
+                    return None
+                text_size = response.headers.get('X-Text-Size')
+                if text_size is not None and int(text_size) < start:
+                    # log was truncated or replaced, start over
+                    start = 0
+                    continue
+                written = self.copy_response_to_files(response, file_names, start, source)
+                more_data = response.headers.get('X-More-Data') == 'true'
+            break
+        # the server's X-Text-Size is where the next request has to start
+        offset = int(text_size) if text_size is not None else start + written
+        self.write_json_file("details.json", "LogOffsets", key, {'job': job_name, 'build': build_number, 'offset': offset, 'more': more_data})
+        self.report_log_transfer(file_names[0], written, time.time() - started)
+        return written
+
+    def report_log_transfer(self, file_name, written, elapsed):
+        """
+        Record and print bytes and throughput of one log download
+        """
+        if self.metrics is not None:
+            self.metrics.add_written(written)
+        with self.json_lock:
+            self.log_transfers.append({'file': file_name, 'bytes': written, 'seconds': elapsed})
+        throughput = written / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+        print('{}: {} bytes in {:.2f}s ({:.2f} MiB/s)'.format(os.path.basename(file_name), written, elapsed, throughput))
+
     def backup_view_build_log(self, view_name, build_number=None):
         if build_number==None:
             build_number=self.get_view_build_number(view_name)
@@ -496,14 +2583,10 @@ class MyJenkins():
         Backup view build log
         """
         try:
-            response = self.session.get(self.url + '/view/' + view_name + '/' + str(build_number) + '/logText/progressiveText')
-            file_to_write = open(self.views_log_dir+view_name + str(build_number) + '.txt', 'w')
-            file_to_write.write(response.text)
-            file_to_write.close()
-            file_to_write = open(self.views_log_dir+view_name + str(build_number) + '.xml', 'w')
-            file_to_write.write(response.text)
-            file_to_write.close()
-            return True
+            log_file = os.path.join(self.views_log_dir, view_name + str(build_number))
+            written = self.stream_to_files(self.url + '/view/' + view_name + '/' + str(build_number) + '/logText/progressiveText',
+                                           [log_file + '.txt', log_file + '.xml'])
+            return written is not None
         except:
             return False
     
@@ -514,14 +2597,10 @@ class MyJenkins():
         Backup node build log
         """
         try:
-            response = self.session.get(self.url + '/computer/' + node_name + '/' + str(build_number) + '/logText/progressiveText')
-            file_to_write = open(self.nodes_log_dir+node_name + str(build_number) + '.txt', 'w')
-            file_to_write.write(response.text)
-            file_to_write.close()
-            file_to_write = open(self.nodes_log_dir+node_name + str(build_number) + '.xml', 'w')
-            file_to_write.write(response.text)
-            file_to_write.close()
-            return True
+            log_file = os.path.join(self.nodes_log_dir, node_name + str(build_number))
+            written = self.stream_to_files(self.url + '/computer/' + node_name + '/' + str(build_number) + '/logText/progressiveText',
+                                           [log_file + '.txt', log_file + '.xml'])
+            return written is not None
         except:
             return False
     def restore_node_build_log(self, node_name, build_number=None):
@@ -564,6 +2643,9 @@ class MyJenkins():
         """
         Get all views
         """
+        inventory = self.get_inventory()
+        if inventory is not None:
+            return inventory.views
         views = []
         try:
             response = self.session.get(self.url + '/view/all/api/json')
@@ -587,6 +2669,9 @@ class MyJenkins():
         """
         Get all jobs
         """
+        inventory = self.get_inventory()
+        if inventory is not None:
+            return [item.as_job() for item in inventory.jobs]
         jobs = []
         try:
             response = self.session.get(self.url + '/api/json')
@@ -613,6 +2698,10 @@ class MyJenkins():
         """
         Get job last build
         """
+        inventory = self.get_inventory()
+        if inventory is not None and inventory.find(job_name) is not None:
+            last_build = inventory.find(job_name).last_build
+            return {'number': last_build} if last_build is not None else None
         try:
             response = self.session.get(self.url + '/job/' + job_name + '/lastBuild/api/json')
             return response.json()
@@ -692,13 +2781,22 @@ class MyJenkins():
             build_number=self.get_job_build_number(job_name)
 
         """
-        Get job build log
+        Get job build log as text, the whole console in memory; backups use stream_job_build_log
         """
         try:
-            response = self.session.get(self.url + '/job/' + job_name + '/' + str(build_number) + '/logText/progressiveText')
+            response = self.session.get(self.url + job_url_path(job_name) + '/' + str(build_number) + '/logText/progressiveText')
             return response.text
         except:
             return None
+
+    def stream_job_build_log(self, job_name, file_names, build_number=None):
+        """
+        Streaming variant of get_job_build_log: copy the log to file_names chunk by chunk.
+        Returns the number of bytes written or None
+        """
+        if build_number==None:
+            build_number=self.get_job_build_number(job_name)
+        return self.stream_to_files(self.url + job_url_path(job_name) + '/' + str(build_number) + '/logText/progressiveText', file_names)
     
     def get_node_log(self, node_name, log_id):
         """
@@ -730,11 +2828,20 @@ class MyJenkins():
             return response.json()['lastBuild']['number']
         except:
             return None
+
+    def get_view_build_number(self, view_name):
+        """
+        Get view build number, the name the view log helpers call
+        """
+        return self.get_View_build_number(view_name)
     
     def get_job_build_number(self, job_name):
         """
         Get job build number
         """
+        inventory = self.get_inventory()
+        if inventory is not None and inventory.find(job_name) is not None:
+            return inventory.find(job_name).last_build
         try:
             response = self.session.get(self.url + '/job/' + job_name + '/api/json')
             return response.json()['lastBuild']['number']
@@ -779,15 +2886,13 @@ class MyJenkins():
         if build_number==None:
             build_number=self.get_plugin_build_number(plugin_name)
         """
-        Backup plugin build log
+        Backup plugin build log, streamed once into both files
         """
         try:
-            #response = self.session.get(self.url + '/plugin/' + plugin_name + '/' + str(build_number) + '/logText/progressiveText')
-            with open(self.plugins_log_dir+plugin_name + str(build_number) + '.log', 'w') as f:
-                f.write(self.get_plugin_build_log(plugin_name))
-            with open(self.plugins_log_dir+plugin_name + str(build_number) + '.xml', 'w') as f:
-                f.write(self.get_plugin_build_log(plugin_name))    
-            return True
+            log_file = os.path.join(self.plugins_log_dir, plugin_name + str(build_number))
+            written = self.stream_to_files(self.url + '/plugin/' + plugin_name + '/' + str(build_number) + '/logText/progressiveText',
+                                           [log_file + '.log', log_file + '.xml'])
+            return written is not None
         except:
             return False
     def backup_plugin_build_config(self, plugin_name, build_number=None):
@@ -846,10 +2951,13 @@ class MyJenkins():
 
     def get_folder_build_number(self, folder_name):
         """
-        Get folder build number
+        Get the last build number of a folder or nested job from its full path
         """
+        inventory = self.get_inventory()
+        if inventory is not None and inventory.find(folder_name) is not None:
+            return inventory.find(folder_name).last_build
         try:
-            response = self.session.get(self.url + '/job/' + folder_name + '/api/json')
+            response = self.session.get(self.url + job_url_path(folder_name) + '/api/json')
             return response.json()['lastBuild']['number']
         except:
             return None
@@ -868,8 +2976,11 @@ class MyJenkins():
         """
         Get folder job build number
         """
+        inventory = self.get_inventory()
+        if inventory is not None and inventory.find(folder_name + '/' + job_name) is not None:
+            return inventory.find(folder_name + '/' + job_name).last_build
         try:
-            response = self.session.get(self.url + '/job/' + folder_name + '/job/' + job_name + '/api/json')
+            response = self.session.get(self.url + job_url_path(folder_name + '/' + job_name) + '/api/json')
             return response.json()['lastBuild']['number']
         except:
             return None
@@ -888,6 +2999,9 @@ class MyJenkins():
         """
         Get all plugins
         """
+        inventory = self.get_inventory()
+        if inventory is not None and inventory.plugins is not None:
+            return inventory.plugins
         plugins = []
         try:
             response = self.session.get(self.url + '/pluginManager/api/json')
@@ -920,6 +3034,9 @@ class MyJenkins():
         """
         Get jobs by folder
         """
+        inventory = self.get_inventory()
+        if inventory is not None and inventory.find(folder_name) is not None and inventory.find(folder_name).complete:
+            return [item.as_job() for item in inventory.find(folder_name).children]
         try:
             response = self.session.get(self.url + '/job/' + folder_name + '/api/json')
             return response.json()['jobs']
@@ -962,6 +3079,9 @@ class MyJenkins():
         """
         Get all folders
         """
+        inventory = self.get_inventory()
+        if inventory is not None:
+            return [item.as_job() for item in inventory.folders()]
         folders = []
         try:
             response = self.session.get(self.url + '/api/json')
@@ -1006,7 +3126,7 @@ class MyJenkins():
         Get folder job config
         """
         try:
-            response = self.session.get(self.url + '/job/' + folder_name + '/job/' + job_name + '/config.xml')
+            response = self.session.get(self.url + job_url_path(folder_name) + '/job/' + job_name + '/config.xml')
             return response.text
         except:
             return None
@@ -1025,27 +3145,42 @@ class MyJenkins():
         if build_number==None:
             build_number=self.get_folder_job_build_number(folder_name, job_name)
         """
-        Get folder job build log
+        Get folder job build log as text, the whole console in memory; backups use stream_folder_job_build_log
         """
         try:
-            response = self.session.get(self.url + '/job/' + folder_name + '/job/' + job_name + '/' + str(build_number) + '/logText/progressiveText')
+            response = self.session.get(self.url + job_url_path(folder_name + '/' + job_name) + '/' + str(build_number) + '/logText/progressiveText')
             return response.text
         except:
             return None
+
+    def stream_folder_job_build_log(self, folder_name, job_name, file_names, build_number=None):
+        """
+        Streaming variant of get_folder_job_build_log: copy the log to file_names chunk by chunk.
+        Returns the number of bytes written or None
+        """
+        if build_number==None:
+            build_number=self.get_folder_build_number(folder_name + '/' + job_name)
+        return self.stream_job_build_log(folder_name + '/' + job_name, file_names, build_number)
     
     def backup_folder_build_log(self, folder_name, build_number=None):
         if build_number==None:
             build_number=self.get_folder_build_number(folder_name)
         """
-        Backup folder build log
+        Backup the build log of a folder or of a job nested in folders, folder_name being
+        its full path, under the folder log directory mirroring that path
         """
         try:
-            log = self.get_folder_build_log(folder_name, build_number)
-            with open(self.folder_log_dir+folder_name + str(build_number) + '.log', 'w') as f:
-                f.write(log)
-            with open(self.folder_log_dir+folder_name + str(build_number) + '.xml', 'w') as f:
-                f.write(log)  
-            self.write_json_file("details.json","Folders",folder_name, self.folder_log_dir+folder_name + str(build_number) + '.xml')  
+            log_file = os.path.join(self.folder_log_dir, *folder_name.split('/')) + str(build_number)
+            if self.archive is None:
+                os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            file_names = [log_file + '.log', log_file + '.xml']
+            if self.incremental_logs:
+                written = self.stream_log_increment(folder_name, build_number, file_names)
+            else:
+                written = self.stream_job_build_log(folder_name, file_names, build_number)
+            if written is None:
+                return False
+            self.write_json_file("details.json","Folders",folder_name, (os.path.dirname(log_file), os.path.basename(log_file) + '.xml'))
             return True
         except:
             return False
@@ -1062,13 +3197,14 @@ class MyJenkins():
             pass
         return builds
    
-    def create_job(self, job_name):
+    def create_job(self, job_name, job_config=None):
         """
-        Create job
+        Create job, from job_config or the backup directory
         """
         try:
-            with open(os.path.join(self.jobs_dir, job_name + '.xml'), 'r') as f:
-                job_config = f.read()
+            if job_config is None:
+                with open(os.path.join(self.jobs_dir, job_name + '.xml'), 'r') as f:
+                    job_config = f.read()
             response = self.session.post(f"{self.url}/createItem?name={job_name}", data=job_config)
             print(response.status_code)
             return True
@@ -1076,51 +3212,55 @@ class MyJenkins():
             print(e)
             return False
     
-    def create_config(self, config_name):
+    def create_config(self, config_name, config_config=None):
         """
-        Create config
+        Create config, from config_config or the backup directory
         """
         try:
-            with open(os.path.join(self.config_dir, f'{config_name}.xml'), 'r') as f:
-                config_config = f.read()
-            self.session.post(self.url + '/config.xml', data=config_config)
-            return True
+            if config_config is None:
+                with open(os.path.join(self.config_dir, f'{config_name}.xml'), 'r') as f:
+                    config_config = f.read()
+            response = self.session.post(self.url + '/config.xml', data=config_config)
+            return response.ok
         except:
             return False
     
-    def create_plugin(self, plugin_name):
+    def create_plugin(self, plugin_name, plugin_config=None):
         """
-        Create plugin
+        Create plugin, from plugin_config or the backup directory
         """
-        with open(os.path.join(self.plugins_dir, f'{plugin_name}.xml'), 'r') as f:
-            plugin_config = f.read()
+        if plugin_config is None:
+            with open(os.path.join(self.plugins_dir, f'{plugin_name}.xml'), 'r') as f:
+                plugin_config = f.read()
         try:
-            self.session.post(self.url + '/pluginManager/installNecessaryPlugins', data=plugin_config)
-            return True
+            response = self.session.post(self.url + '/pluginManager/installNecessaryPlugins', data=plugin_config)
+            return response.ok
         except:
             return False
     
-    def create_view(self, view_name):
+    def create_view(self, view_name, view_config=None):
         """
-        Create view
+        Create view, from view_config or the backup directory
         """
-        with open(os.path.join(self.views_dir, f'{view_name}.xml'), 'r') as f:
-            view_config = f.read()
+        if view_config is None:
+            with open(os.path.join(self.views_dir, f'{view_name}.xml'), 'r') as f:
+                view_config = f.read()
         try:
-            self.session.post(self.url + '/createView?name=' + view_name, data=view_config)
-            return True
+            response = self.session.post(self.url + '/createView?name=' + view_name, data=view_config)
+            return response.ok
         except:
             return False
     
-    def create_node(self, node_name):
+    def create_node(self, node_name, node_config=None):
         """
-        Create node
+        Create node, from node_config or the backup directory
         """
-        with open(os.path.join(self.nodes_dir, f'{node_name}.xml'), 'r') as f:
-            node_config = f.read()
+        if node_config is None:
+            with open(os.path.join(self.nodes_dir, f'{node_name}.xml'), 'r') as f:
+                node_config = f.read()
         try:
-            self.session.post(self.url + '/computer/doCreateItem?name=' + node_name, data=node_config)
-            return True
+            response = self.session.post(self.url + '/computer/doCreateItem?name=' + node_name, data=node_config)
+            return response.ok
         except:
             return False
     
@@ -1136,17 +3276,16 @@ class MyJenkins():
         except:
             return False
     
-    def create_folder_job(self, folder_name, job_name):
+    def create_folder_job(self, folder_name, job_name, job_config=None):
         """
-        Create folder job
+        Create folder job, from job_config or the backup directory; folder_name may be a nested folder path
         """
-        with open(os.path.join(self.folder_jobs_dir, f'{job_name}.xml'), 'r') as f:
-            job_config = f.read()
-        try:
-            self.session.post(self.url + '/job/' + folder_name + '/createItem?name=' + job_name, data=job_config)
-            return True
-        except:
-            return False
+        file_name = None
+        if job_config is None:
+            file_name = self.folder_job_file(folder_name, job_name)
+            if not os.path.exists(file_name):
+                file_name = os.path.join(self.folder_jobs_dir, f'{job_name}.xml')
+        return self.create_item_in_folder(folder_name, job_name, file_name, job_config)
     
     def create_folder_view(self, folder_name, view_name):
         """
@@ -1274,16 +3413,22 @@ class MyJenkins():
         self.nodes_dir = os.path.join(self.backup_dir, 'nodes')
         self.zip_dir = os.path.join(self.backup_dir, 'zip')
         self.zip = os.path.join(self.zip_dir, 'backup.zip')
+        self.zip_file = self.zip
         self.config_dir = os.path.join(self.backup_dir, 'config')
+        self.log_dir = os.path.join(self.backup_dir, 'log')
 
         
-        self.create_dir(self.backup_dir)
-        self.create_dir(self.jobs_dir)
-        self.create_dir(self.plugins_dir)
-        self.create_dir(self.views_dir)
-        self.create_dir(self.nodes_dir)
-        self.create_dir(self.zip_dir)
-        self.create_dir(self.config_dir)
+        if self.stream_archive:
+            self.open_archive(self.zip)
+        else:
+            self.create_dir(self.backup_dir)
+            self.create_dir(self.jobs_dir)
+            self.create_dir(self.plugins_dir)
+            self.create_dir(self.views_dir)
+            self.create_dir(self.nodes_dir)
+            self.create_dir(self.zip_dir)
+            self.create_dir(self.config_dir)
+            self.create_dir(self.log_dir)
         try:
             jobs = self.get_jobs()
             for job in jobs:
@@ -1292,18 +3437,22 @@ class MyJenkins():
                 job_config = self.get_job_config(job_name)
                 
                 if job_config:
-                    with open(os.path.join(self.jobs_dir, job_name + '.xml'), 'w') as job_file:
-                        job_file.write(job_config)
+                    self.write_backup_file(os.path.join(self.jobs_dir, job_name + '.xml'), job_config)
                     self.write_json_file("details.json","Jobs",job_name,os.path.join(self.jobs_dir, job_name + '.xml'))
                         
+                if self.history_enabled:
+                    self.backup_build_history(job_name, self.log_dir)
+                    continue
                 last_build = self.get_job_last_build(job_name)
                 if last_build:
                     build_number = last_build['number']
 
-                    build_log = self.get_job_build_log(job_name, build_number)
-                    if build_log:
-                        with open(os.path.join(self.log_dir, job_name + '.log'), 'w') as job_file:
-                            job_file.write(build_log)
+                    file_names = [os.path.join(self.log_dir, job_name + '.log')]
+                    if self.incremental_logs:
+                        written = self.stream_log_increment(job_name, build_number, file_names)
+                    else:
+                        written = self.stream_to_files(self.url + '/job/' + job_name + '/' + str(build_number) + '/logText/progressiveText', file_names)
+                    if written is not None:
                         self.write_json_file("details.json","Builds","{}{}".format(job_name,build_number),os.path.join(self.log_dir, job_name + '.log'))
         except:
             pass
@@ -1313,9 +3462,8 @@ class MyJenkins():
                 plugin_name = plugin['shortName']
                 plugin_config = self.get_plugin_config(plugin_name)
                 if plugin_config:
-                    with open(os.path.join(self.plugins_dir, plugin_name + '.xml'), 'w') as plugin_file:
-                        plugin_file.write(plugin_config)
-                        self.write_json_file("details.json","Plugins",plugin_name,os.path.join(self.plugins_dir, plugin_name + '.xml'))
+                    self.write_backup_file(os.path.join(self.plugins_dir, plugin_name + '.xml'), plugin_config)
+                    self.write_json_file("details.json","Plugins",plugin_name,os.path.join(self.plugins_dir, plugin_name + '.xml'))
                     if self.mylogger==True:
                         self.backup_plugin_build_log(plugin_name,self.get_plugin_build_number(plugin_name))
                             
@@ -1327,9 +3475,8 @@ class MyJenkins():
                 view_name = view['name']
                 view_config = self.get_view_config(view_name)
                 if view_config:
-                    with open(os.path.join(self.views_dir, view_name + '.xml'), 'w') as view_file:
-                        view_file.write(view_config)
-                        self.write_json_file("details.json","Views",view_name,os.path.join(self.views_dir, view_name + '.xml'))
+                    self.write_backup_file(os.path.join(self.views_dir, view_name + '.xml'), view_config)
+                    self.write_json_file("details.json","Views",view_name,os.path.join(self.views_dir, view_name + '.xml'))
         except:
             pass
         try:
@@ -1338,21 +3485,25 @@ class MyJenkins():
                 node_name = node['displayName']
                 node_config = self.get_node_config(node_name)
                 if node_config:
-                    with open(os.path.join(self.nodes_dir, node_name + '.xml'), 'w') as node_file:
-                        node_file.write(node_config)
-                        self.write_json_file("details.json","Nodes",node_name,os.path.join(self.nodes_dir, node_name + '.xml'))
+                    self.write_backup_file(os.path.join(self.nodes_dir, node_name + '.xml'), node_config)
+                    self.write_json_file("details.json","Nodes",node_name,os.path.join(self.nodes_dir, node_name + '.xml'))
         except:
             pass                          
         try:
             config = self.get_config()
             if config:
-                with open(os.path.join(self.config_dir, 'config.xml'), 'w') as config_file:
-                    config_file.write(config)
-                    self.write_json_file("details.json","Config","config",os.path.join(self.config_dir, 'config.xml'))
+                self.write_backup_file(os.path.join(self.config_dir, 'config.xml'), config)
+                self.write_json_file("details.json","Config","config",os.path.join(self.config_dir, 'config.xml'))
         except:
             pass        
-        self.compress_all_files_in_dir(self.zip,self.backup_dir)
-        self.remove_all_files_in_dir(self.backup_dir)
+        self.flush_manifests()
+        self.write_manifest_to_backup()
+        self.commit_store_snapshot()
+        if self.archive is not None:
+            self.close_archive(self.zip)
+        else:
+            self.compress_all_files_in_dir(self.prepare_archive(self.zip),self.backup_dir)
+            self.remove_all_files_in_dir(self.backup_dir)
 
     def restore(self, backup_dir=None):
 
@@ -1371,32 +3522,15 @@ class MyJenkins():
         self.zip_dir = os.path.join(self.backup_dir, 'zip')
         self.zip= os.path.join(self.backup_dir, 'zip.zip')
         self.config_dir = os.path.join(self.backup_dir, 'config')
+        self.folder_jobs_dir = os.path.join(self.folder_dir, 'jobs')
 
         #check if backup dir exists
-        if not os.path.exists(self.backup_dir):
+        if not os.path.exists(self.backup_dir) and self.incremental:
+            self.decompress_incremental_chain(self.zip)
+        elif not os.path.exists(self.backup_dir):
             self.decompress_all_files_in_dir(self.zip, self.backup_dir)
         
-        for job_file in os.listdir(self.jobs_dir):
-            job_name = job_file.split('.')[0]
-            self.create_job(job_name)
-        
-        for plugin_file in os.listdir(self.plugins_dir):
-            plugin_name = plugin_file.split('.')[0]
-            self.create_plugin(plugin_name)
-        
-        for config_config in os.listdir(self.config_dir):
-            config_config = config_config.split('.')[0]
-            self.create_config(config_config)
-        for folder_file in os.listdir(self.folder_dir):
-            folder_name = folder_file.split('.')[0]
-            self.create_folder(folder_name)
-
-        for view_file in os.listdir(self.views_dir):
-            view_name = view_file.split('.')[0]
-            self.create_view(view_name)
-        for node_file in os.listdir(self.nodes_dir):
-            node_name = node_file.split('.')[0]
-            self.create_node(node_name)
+        self.restore_scheduled()
         #Remove all files in backup dir
         self.remove_all_files_in_dir(self.backup_dir)
     def create_folder(self, folder_name):
@@ -1480,19 +3614,98 @@ class MyJenkins():
         except:
             return False
 
+    def get_job_builds(self, job_name, limit=None, since=None, page_size=100):
+        """
+        List builds of a job newest first with ranged tree queries, the last limit
+        builds and/or those started at or after since (epoch milliseconds). Pages of
+        allBuilds (builds is capped by Jenkins) are read until limit is reached or a
+        build older than since shows up, so the full history is never requested at once
+        """
+        builds = []
+        start = 0
+        while True:
+            end = start + page_size if not limit else min(start + page_size, limit)
+            tree = 'allBuilds[number,timestamp,result]{' + str(start) + ',' + str(end) + '}'
+            try:
+                response = self.session.get(self.url + job_url_path(job_name) + '/api/json', params={'tree': tree})
+                page = response.json().get('allBuilds', [])
+            except Exception as e:
+                print(e)
+                return []
+            builds += page
+            if len(page) < end - start or (limit and end >= limit):
+                break
+            if since is not None and page and page[-1].get('timestamp', 0) < since:
+                break
+            start = end
+        if limit:
+            builds = builds[:limit]
+        if since is not None:
+            builds = [build for build in builds if build.get('timestamp', 0) >= since]
+        return builds
+
+    def backup_build(self, job_name, build, build_dir):
+        """
+        Stream the console of one build to build_dir/<number>.log
+        """
+        file_name = os.path.join(build_dir, str(build['number']) + '.log')
+        written = self.stream_to_files(self.url + job_url_path(job_name) + '/' + str(build['number']) + '/logText/progressiveText', [file_name])
+        if written is None:
+            return None
+        return {'timestamp': build.get('timestamp'), 'result': build.get('result'), 'file': (build_dir, str(build['number']) + '.log')}
+
+    def get_build_executor(self, workers):
+        """
+        Get the pool shared by the build history of every job. Jobs backed up concurrently
+        queue their consoles on it, so downloads stay capped at workers instead of workers²
+        """
+        with self.build_executor_lock:
+            if self.build_executor is None:
+                self.build_executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers, self.max_workers)))
+            return self.build_executor
+
+    def close_build_executor(self):
+        """
+        Shut down the build history pool
+        """
+        with self.build_executor_lock:
+            if self.build_executor is not None:
+                self.build_executor.shutdown()
+                self.build_executor = None
+
+    def backup_build_history(self, job_name, log_dir=None, workers=None):
+        """
+        Backup the consoles of the builds selected by history_builds / history_since,
+        one file per build number under log_dir/<job_name>/, downloaded concurrently
+        """
+        if log_dir is None:
+            log_dir = self.jobs_log_dir
+        if workers is None:
+            workers = self.workers
+        builds = self.get_job_builds(job_name, self.history_builds, self.history_since)
+        build_dir = os.path.join(log_dir, job_name)
+        if self.archive is None:
+            os.makedirs(build_dir, exist_ok=True)
+        results = list(self.get_build_executor(workers).map(lambda build: self.backup_build(job_name, build, build_dir), builds))
+        saved = {str(build['number']): result for build, result in zip(builds, results) if result is not None}
+        self.write_json_file("details.json","JobBuilds",job_name,saved)
+        return len(saved) == len(builds)
+
     def backup_log(self, job_name, build_number=None):
+        if build_number==None and self.history_enabled:
+            return self.backup_build_history(job_name)
         if build_number==None:
             build_number=self.get_job_build_number(job_name)
         """
         Backup job build log
         """
         try:
-            build_log = self.get_job_build_log(job_name, build_number)
-            if build_log:
-                with open(os.path.join(self.jobs_log_dir, job_name + '.log'), 'w') as job_file:
-                    job_file.write(build_log)
-                with open(os.path.join(self.jobs_log_dir, job_name + '.xml'), 'w') as job_file:
-                    job_file.write(build_log) 
+            file_names = [os.path.join(self.jobs_log_dir, job_name + '.log'), os.path.join(self.jobs_log_dir, job_name + '.xml')]
+            if self.incremental_logs:
+                written = self.stream_log_increment(job_name, build_number, file_names)
+            else:
+                written = self.stream_job_build_log(job_name, file_names, build_number)
+            if written is not None:
                 self.write_json_file("details.json","JobLogs",job_name, (self.jobs_log_dir, job_name + '.xml'))    
             return True
         except:
@@ -1529,18 +3742,14 @@ class MyJenkins():
     
     def backup_view_log(self, view_name, build_number=None):
         if build_number==None:
-            build_number=get_view_build_number(view_name)
+            build_number=self.get_view_build_number(view_name)
         """
-        Backup view build log
+        Backup view build log, streamed to disk
         """
         try:
-            build_log = self.get_view_build_log(view_name, build_number)
-            if build_log:
-                
-                with open(os.path.join(self.views_log_dir, view_name + '.log'), 'w') as view_file:
-                    view_file.write(build_log)
-                with open(os.path.join(self.views_log_dir, view_name + '.xml'), 'w') as view_file:
-                    view_file.write(build_log)    
+            written = self.stream_to_files(self.url + '/view/' + view_name + '/' + str(build_number) + '/logText/progressiveText',
+                                           [os.path.join(self.views_log_dir, view_name + '.log'), os.path.join(self.views_log_dir, view_name + '.xml')])
+            if written:
                 self.write_json_file("details.json","ViewLogs",view_name, (self.views_log_dir, view_name + '.xml'))    
             return True
         except:
@@ -1571,8 +3780,7 @@ class MyJenkins():
             if node_config:
                 if self.loggers:
                     self.backup_node_build_log(node_name)
-                with open(os.path.join(self.nodes_dir, node_name + '.xml'), 'w') as node_file:
-                    node_file.write(node_config)
+                self.write_backup_file(os.path.join(self.nodes_dir, node_name + '.xml'), node_config)
                 self.write_json_file("details.json","Nodes",node_name, (self.nodes_dir, node_name + '.xml'))
             return True
         except:
@@ -1583,7 +3791,9 @@ class MyJenkins():
         Restore node
         """
         try:
-            with open(os.path.join(self.nodes_log_dir, node_name + '.xml'), 'r') as node_file:
+            if self.restore_from_archive:
+                return self.create_node(node_name, self.read_archive_member(os.path.join(self.nodes_dir, node_name + '.xml')))
+            with open(os.path.join(self.nodes_dir, node_name + '.xml'), 'r') as node_file:
                 node_config = node_file.read()
             self.create_node(node_name, node_config)
             return True
@@ -1674,25 +3884,93 @@ class MyJenkins():
             if view_config:
                 if self.loggers==True:
                     self.backup_view_build_log(view_name)
-                with open(os.path.join(self.views_dir, view_name + '.xml'), 'w') as view_file:
-                    view_file.write(view_config)
+                self.write_backup_file(os.path.join(self.views_dir, view_name + '.xml'), view_config)
                 self.write_json_file("details.json","Views",view_name, (self.views_dir, view_name + '.xml'))
             return True
         except:
             return False
     
+    def list_folder_items(self, folder_path=''):
+        """
+        List the direct children of a folder path (the top level for an empty path) with one tree request
+        """
+        parent = job_url_path(folder_path) if folder_path else ''
+        response = self.session.get(self.url + parent + '/api/json?tree=jobs[name,url,lastBuild[number]]')
+        items = []
+        for job in response.json().get('jobs', []):
+            last_build = job['lastBuild']['number'] if job.get('lastBuild') else None
+            is_folder = job.get('_class') == FOLDER_CLASS or 'jobs' in job
+            path = folder_path + '/' + job['name'] if folder_path else job['name']
+            items.append(InventoryItem(job['name'], path, job.get('_class', ''), job.get('url', ''), last_build, is_folder))
+        return items
+
+    def walk_folders(self, folder_path='', workers=None):
+        """
+        Yield every job and folder below folder_path breadth first as soon as it is listed.
+        From a loaded inventory no request is made, otherwise each discovered folder
+        is listed on a bounded pool while earlier items are already being yielded.
+        """
+        if self.inventory is not None and (not folder_path or self.inventory.find(folder_path) is not None):
+            root = self.inventory.find(folder_path) if folder_path else None
+            if root is None or root.complete:
+                queue = list(root.children if root is not None else self.inventory.jobs)
+                while queue:
+                    item = queue.pop(0)
+                    yield item
+                    if item.complete:
+                        queue.extend(item.children)
+                    else:
+                        yield from self.walk_folders_live(item.path, workers)
+                return
+        yield from self.walk_folders_live(folder_path, workers)
+
+    def walk_folders_live(self, folder_path='', workers=None):
+        """
+        Walk folder_path breadth first by listing each folder on a bounded pool
+        """
+        if workers is None:
+            workers = self.workers
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers, self.max_workers))) as executor:
+            pending = [executor.submit(self.list_folder_items, folder_path)]
+            while pending:
+                # oldest listing first keeps the walk breadth first
+                future = pending.pop(0)
+                try:
+                    items = future.result()
+                except Exception as e:
+                    print(e)
+                    continue
+                for item in items:
+                    if item.is_folder:
+                        pending.append(executor.submit(self.list_folder_items, item.path))
+                    yield item
+
+    def backup_folder_item(self, item):
+        """
+        Backup a job or folder found inside a folder into the folder jobs directory
+        """
+        with self.get_controller_slots():
+            folder_name = item.path.rsplit('/', 1)[0]
+            return self.backup_job(item.name, file_path=os.path.dirname(self.folder_job_file(folder_name, item.name)), folder_name=folder_name)
+
+    def backup_folder_items(self, items, workers=None):
+        """
+        Backup a stream of folder items on a bounded pool as they arrive
+        """
+        if workers is None:
+            workers = self.workers
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers, self.max_workers))) as executor:
+            futures = [executor.submit(self.checkpointed, 'job', item.path, self.backup_folder_item, item, folder=item.is_folder) for item in items]
+            return all(future.result() for future in futures)
+
     def backup_folder(self, folder_name):
         """
-        Backup folder
+        Backup folder and everything nested in it
         """
         try:
-            jobs = self.get_jobs_by_folder(folder_name)
-            for job in jobs:
-                if self.loggers==True:
-                    self.backup_folder_build_log(folder_name)
-                job_name = job['name']
-                self.backup_job(job_name,file_path=self.folder_jobs_dir,folder_name=folder_name)
-            return True
+            if self.loggers==True:
+                self.backup_folder_build_log(folder_name)
+            return self.backup_folder_items(self.walk_folders(folder_name))
         except:
             return False
     
@@ -1715,17 +3993,19 @@ class MyJenkins():
         Backup job
         """
         try:
-            job_config = self.get_job_config(job_name)
+            if folder_name is None:
+                job_config = self.get_job_config(job_name)
+            else:
+                job_config = self.get_folder_job_config(folder_name, job_name)
             
             if file_path==None and folder_name==None:
-                with open(os.path.join(self.jobs_dir, job_name + '.xml'), 'w') as job_file:
-                    job_file.write(job_config)
+                self.write_backup_file(os.path.join(self.jobs_dir, job_name + '.xml'), job_config)
                 self.write_json_file("details.json","Jobs",job_name, (self.jobs_dir, job_name + '.xml'))
                 
             else:
-                with open(os.path.join(file_path, job_name + '.xml'), 'w') as job_file:
-                    job_file.write(job_config)
+                self.write_backup_file(os.path.join(file_path, job_name + '.xml'), job_config)
                 self.write_json_file("details.json","Folder",folder_name,{job_name:(file_path, job_name + '.xml')})
+                self.write_json_file("details.json","FolderJobs",folder_name + '/' + job_name,folder_name)
                 
             return True
         except:
@@ -1736,14 +4016,16 @@ class MyJenkins():
         Restore job
         """
         try:
+            if self.restore_from_archive:
+                return self.restore_job_from_archive(job_name)
             if file_path==None:
                 with open(os.path.join(self.jobs_dir, job_name + '.xml'), 'r') as job_file:
                     job_config = job_file.read()
-                self.create_job(job_name)
+                self.create_job(job_name, job_config)
             else:
                 with open(os.path.join(file_path, job_name + '.xml'), 'r') as job_file:
                     job_config = job_file.read()
-                self.create_folder_job(folder_name, job_name)
+                self.create_folder_job(folder_name, job_name, job_config)
             return True
         except Exception as e:
             print(e)
@@ -1755,23 +4037,168 @@ class MyJenkins():
         """
         try:
             plugin_config = self.get_plugin_config(plugin_name)
-            with open(os.path.join(self.plugins_dir, plugin_name + '.xml'), 'w') as plugin_file:
-                plugin_file.write(plugin_config)
+            self.write_backup_file(os.path.join(self.plugins_dir, plugin_name + '.xml'), plugin_config)
             self.write_json_file("details.json","Plugins",plugin_name, (self.plugins_dir, plugin_name + '.xml'))
             return True
         except:
             return False
     
-    def backup_all_jobs(self):
+    def print_rate_limiter_status(self):
+        """
+        Print current request rate, concurrency and queue depth
+        """
+        stats = self.session.limiter.stats()
+        rate = 'unlimited' if stats['rate'] is None else '{:.1f}/s'.format(stats['rate'])
+        print('requests: rate {}, concurrency {}, in flight {}, queued {}'.format(rate, stats['concurrency'], stats['active'], stats['queue_depth']))
+        return stats
+
+    def open_metrics(self, operation):
+        """
+        Start collecting run metrics when --metrics_file or --metrics_port is given
+        """
+        if not (self.metrics_file or self.metrics_port):
+            return None
+        self.metrics = RunMetrics(operation)
+        self.metrics.stats = self.session.stats
+        if self.metrics_port:
+            self.metrics.serve(self.metrics_port)
+            print('serving metrics on http://localhost:{}/metrics'.format(self.metrics_port))
+        return self.metrics
+
+    def start_profiler(self, operation):
+        """
+        Start --profile cpu|mem around a backup or restore
+        """
+        if not self.profile:
+            return None
+        self.profiler = Profiler(self.profile, operation).start()
+        return self.profiler
+
+    def stop_profiler(self):
+        """
+        Write the profile into --profile_dir, by default next to the archive. Never into
+        the backup directory, whose contents are archived by the next backup
+        """
+        if self.profiler is None:
+            return None
+        file_names = self.profiler.stop(self.profile_dir or os.path.dirname(os.path.abspath(self.zip_file)))
+        self.profiler = None
+        for file_name in file_names:
+            print('profile written to ' + file_name)
+        return file_names
+
+    def metrics_phase(self, name):
+        """
+        Time the next phase of the run, e.g. fetch, manifest, archive
+        """
+        if self.metrics is not None:
+            self.metrics.start_phase(name)
+
+    def close_metrics(self, success):
+        """
+        Finish the run metrics and write the textfile
+        """
+        if self.metrics is None:
+            return None
+        self.metrics.start_phase(None)
+        self.metrics.success = success
+        if self.metrics_file:
+            self.metrics.write_textfile(self.metrics_file)
+        self.metrics.shutdown()
+        return self.metrics
+
+    def report_request_stats(self):
+        """
+        Print and/or export the per-request performance report
+        """
+        if self.session.stats is None:
+            return None
+        if self.perf_report:
+            report = self.session.stats.print_summary()
+        if self.perf_json:
+            report = self.session.stats.export(self.perf_json)
+            print('request stats written to ' + self.perf_json)
+        return report
+
+    def open_checkpoint(self, suffix):
+        """
+        Start or resume the checkpoint kept next to the archive, e.g. backup.zip.backup-checkpoint
+        """
+        if not self.resume:
+            return None
+        if self.stream_archive:
+            print('--resume needs the staging directory, not available with --stream_archive')
+            return None
+        self.create_dir(self.zip_dir)
+        self.checkpoint = Checkpoint(self.zip_file + '.' + suffix + '-checkpoint')
+        if self.checkpoint.done:
+            print('resuming, {} items already done'.format(len(self.checkpoint.done)))
+        return self.checkpoint
+
+    def close_checkpoint(self):
+        """
+        Remove the checkpoint after a complete run
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+            self.checkpoint = None
+
+    def checkpointed(self, kind, name, function, *args, folder=False):
+        """
+        Run function(*args) unless kind:name finished in an interrupted earlier run.
+        A folder keeps its kind in the checkpoint key but is counted as a folder
+        """
+        key = kind + ':' + name
+        if self.checkpoint is not None and self.checkpoint.is_done(key):
+            return True
+        result = function(*args)
+        if self.metrics is not None:
+            self.metrics.count('folder' if folder else kind, bool(result))
+        if result and self.checkpoint is not None:
+            self.checkpoint.mark(key)
+        return result
+
+    def get_controller_slots(self):
+        """
+        Get the semaphore capping concurrent requests against this controller
+        """
+        with MyJenkins.controller_slots_lock:
+            if self.url not in MyJenkins.controller_slots:
+                MyJenkins.controller_slots[self.url] = threading.BoundedSemaphore(self.max_workers)
+            return MyJenkins.controller_slots[self.url]
+
+    def backup_job_with_log(self, job_name):
+        """
+        Backup job and its last build log inside a controller slot
+        """
+        with self.get_controller_slots():
+            if self.loggers:
+                self.backup_log(job_name=job_name)
+            return self.backup_job(job_name)
+
+    def backup_all_jobs_concurrently(self, jobs, workers=None):
+        """
+        Backup jobs on a bounded thread pool, same layout as backup_all_jobs
+        """
+        if workers is None:
+            workers = self.workers
+        workers = max(1, min(workers, self.max_workers))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda job: self.checkpointed('job', job['name'], self.backup_job_with_log, job['name'], folder=job.get('_class') == FOLDER_CLASS), jobs))
+        return all(results)
+
+    def backup_all_jobs(self, workers=None):
         """
         Backup all jobs
         """
+        if workers is None:
+            workers = self.workers
         try:
             jobs = self.get_jobs()
+            if workers > 1:
+                return self.backup_all_jobs_concurrently(jobs, workers)
             for job in jobs:
-                if self.loggers:
-                    self.backup_log(job_name=job['name'])
-                self.backup_job(job['name'])
+                self.checkpointed('job', job['name'], self.backup_job_with_log, job['name'], folder=job.get('_class') == FOLDER_CLASS)
             return True
         except Exception as e:
             print(e)
@@ -1782,12 +4209,14 @@ class MyJenkins():
         Backup all folder
         """
         try:
-            folders = self.get_folders()
-            for folder in folders:
-                if self.loggers:
-                    self.backup_folder_build_log(folder_name=folder['name'])
-                self.backup_folder(folder['name'])
-            return True
+            def nested_items():
+                for item in self.walk_folders():
+                    if '/' in item.path:
+                        yield item
+                    elif item.is_folder and self.loggers:
+                        self.backup_folder_build_log(folder_name=item.name)
+            # top level folders are saved with the jobs by backup_all_jobs
+            return self.backup_folder_items(nested_items())
         except:
             return False
     
@@ -1807,31 +4236,13 @@ class MyJenkins():
         """
         Backup all jobs except job
         """
-        try:
-            jobs = self.get_jobs()
-            for job in jobs:
-                if job['name'] != job_name:
-                    if self.loggers:
-                        self.backup_log(job_name=job['name'])
-                    self.backup_job(job['name'])
-            return True
-        except:
-            return False
+        return self.backup_selected(Selection(exclude=[job_name], types=('job', 'folder'), top_level=True))
 
     def backup_all_folder_except_folder(self, folder_name):
         """
         Backup all folder except folder
         """
-        try:
-            folders = self.get_folders()
-            for folder in folders:
-                if folder['name'] != folder_name:
-                    if self.loggers==True:
-                        self.backup_folder_build_log(folder_name=folder['name'])
-                    self.backup_folder(folder['name'])
-            return True
-        except:
-            return False
+        return self.backup_selected(Selection(include=['*/**'], exclude=[folder_name + '/**'], types=('job', 'folder')))
     
     def backup_all_plugin_except_plugin(self, plugin_name):
         """
@@ -1879,7 +4290,7 @@ class MyJenkins():
         try:
             plugins = self.get_plugins()
             for plugin in plugins:
-                self.backup_plugin(plugin['shortName'])
+                self.checkpointed('plugin', plugin['shortName'], self.backup_plugin, plugin['shortName'])
             return True
         except:
             return False
@@ -1919,7 +4330,7 @@ class MyJenkins():
         try:
             views = self.get_views()
             for view in views:
-                self.backup_view(view['name'])
+                self.checkpointed('view', view['name'], self.backup_view, view['name'])
             return True
         except:
             return False
@@ -1928,20 +4339,15 @@ class MyJenkins():
         """
         Backup all views except view
         """
-        try:
-            views = self.get_views()
-            for view in views:
-                if view['name'] != view_name:
-                    self.backup_view(view['name'])
-            return True
-        except:
-            return False
+        return self.backup_selected(Selection(exclude=[view_name], types=('view',)))
 
     def restore_view(self, view_name):
         """
         Restore view
         """
         try:
+            if self.restore_from_archive:
+                return self.create_view(view_name, self.read_archive_member(os.path.join(self.views_dir, view_name + '.xml')))
             with open(os.path.join(self.views_dir, view_name + '.xml'), 'r') as view_file:
                 view_config = view_file.read()
             self.create_view(view_name, view_config)
@@ -1981,6 +4387,8 @@ class MyJenkins():
         Restore plugin
         """
         try:
+            if self.restore_from_archive:
+                return self.create_plugin(plugin_name, self.read_archive_member(os.path.join(self.plugins_dir, plugin_name + '.xml')))
             with open(os.path.join(self.plugins_dir, plugin_name + '.xml'), 'r') as plugin_file:
                 plugin_config = plugin_file.read()
             self.create_plugin(plugin_name, plugin_config)
@@ -2030,14 +4438,7 @@ class MyJenkins():
         """
         Backup all plugins except plugin
         """
-        try:
-            plugins = self.get_plugins()
-            for plugin in plugins:
-                if plugin['shortName'] != plugin_name:
-                    self.backup_plugin(plugin['shortName'])
-            return True
-        except:
-            return False
+        return self.backup_selected(Selection(exclude=[plugin_name], types=('plugin',)))
 
     def restore_all_jobs_except_job(self, job_name):
         """
@@ -2059,14 +4460,114 @@ class MyJenkins():
         Backup all
         """
         try:
-            self.backup_all_jobs()
-            self.backup_all_folder()
-            self.backup_all_plugins()
+            result = self.backup_all_streaming()
             self.backup_all_logs()
-            self.backup_all_views()
-            return True
+            if result:
+                self.record_removed_items()
+            self.flush_manifests()
+            return result
         except:
             return False
+
+    def discover_backup_items(self):
+        """
+        Yield jobs (nested folders included), plugins and views as they are discovered
+        """
+        for item in self.walk_folders():
+            folder = item.path.rsplit('/', 1)[0] if '/' in item.path else ''
+            yield BackupItem('job', item.name, folder, item.is_folder)
+        for plugin in self.get_plugin_list() or []:
+            yield BackupItem('plugin', plugin['shortName'])
+        for view in self.get_view_list() or []:
+            yield BackupItem('view', view['name'])
+
+    def fetch_backup_item(self, item):
+        """
+        Fetch stage: get the config of an item; console logs stream straight to their sink
+        """
+        with self.get_controller_slots():
+            if item.kind == 'plugin':
+                return self.get_plugin_config(item.name)
+            if item.kind == 'view':
+                return self.get_view_config(item.name)
+            if item.kind == 'node':
+                return self.get_node_config(item.name)
+            if item.folder:
+                if self.loggers and not item.is_folder:
+                    self.backup_folder_build_log(item.folder + '/' + item.name)
+                return self.get_folder_job_config(item.folder, item.name)
+            if self.loggers:
+                self.backup_log(job_name=item.name)
+            return self.get_job_config(item.name)
+
+    def store_backup_item(self, item, content):
+        """
+        Sink stage: write a fetched config and its details.json entries
+        """
+        if item.kind == 'plugin':
+            self.write_backup_file(os.path.join(self.plugins_dir, item.name + '.xml'), content)
+            self.write_json_file("details.json","Plugins",item.name, (self.plugins_dir, item.name + '.xml'))
+        elif item.kind == 'view':
+            self.write_backup_file(os.path.join(self.views_dir, item.name + '.xml'), content)
+            self.write_json_file("details.json","Views",item.name, (self.views_dir, item.name + '.xml'))
+        elif item.kind == 'node':
+            self.write_backup_file(os.path.join(self.nodes_dir, item.name + '.xml'), content)
+            self.write_json_file("details.json","Nodes",item.name, (self.nodes_dir, item.name + '.xml'))
+        elif item.folder:
+            file_name = self.folder_job_file(item.folder, item.name)
+            self.write_backup_file(file_name, content)
+            self.write_json_file("details.json","Folder",item.folder,{item.name:(os.path.dirname(file_name), item.name + '.xml')})
+            self.write_json_file("details.json","FolderJobs",item.folder + '/' + item.name,item.folder)
+        else:
+            self.write_backup_file(os.path.join(self.jobs_dir, item.name + '.xml'), content)
+            self.write_json_file("details.json","Jobs",item.name, (self.jobs_dir, item.name + '.xml'))
+        if self.checkpoint is not None:
+            self.checkpoint.mark(item.kind + ':' + (item.folder + '/' + item.name if item.folder else item.name))
+
+    def select_items(self, selection):
+        """
+        Yield the BackupItems matching selection, resolved against the cached inventory
+        """
+        inventory = self.get_inventory()
+        if inventory is None:
+            items = self.discover_backup_items()
+        else:
+            items = itertools.chain(
+                (BackupItem('job', item.name, item.path.rsplit('/', 1)[0] if '/' in item.path else '', item.is_folder) for item in self.walk_folders()),
+                (BackupItem('view', view['name']) for view in inventory.views),
+                (BackupItem('node', node['displayName']) for node in self.get_nodes()),
+                (BackupItem('plugin', plugin['shortName']) for plugin in self.get_plugins()))
+        for item in items:
+            if selection.matches('folder' if item.is_folder else item.kind, item.folder + '/' + item.name if item.folder else item.name):
+                yield item
+
+    def backup_selected(self, selection=None):
+        """
+        Backup only the items matching selection, one config request per selected item
+        """
+        if selection is None:
+            selection = self.selection
+        try:
+            return self.backup_all_streaming(items=self.select_items(selection))
+        except Exception as e:
+            print(e)
+            return False
+
+    def backup_all_streaming(self, workers=None, items=None):
+        """
+        Backup jobs, folders, plugins and views (or the given BackupItems) through a BackupPipeline
+        """
+        if workers is None:
+            workers = self.workers
+        if items is None:
+            items = self.discover_backup_items()
+        def pending_items():
+            for item in items:
+                key = item.kind + ':' + (item.folder + '/' + item.name if item.folder else item.name)
+                if self.checkpoint is None or not self.checkpoint.is_done(key):
+                    yield item
+        pipeline = BackupPipeline(self, max(1, min(workers, self.max_workers)), self.queue_size)
+        return pipeline.run(pending_items())
     def restore_all_plugins(self):
         """
         Restore all plugins
@@ -2085,15 +4586,600 @@ class MyJenkins():
         Restore all
         """
         try:
-            self.restore_all_jobs()
-            self.restore_all_folders()
-            self.restore_all_plugins()
-            self.restore_all_views()
+            return self.restore_scheduled()
+        except Exception as e:
+            print(e)
+            return False
+
+    def list_xml(self, dir_name):
+        """
+        Names of the xml files in a backup directory
+        """
+        if not os.path.isdir(dir_name):
+            return []
+        return sorted(file_name[:-4] for file_name in os.listdir(dir_name) if file_name.endswith('.xml'))
+
+    def list_folder_jobs(self):
+        """
+        Folder paths of the nested job and folder configs under the folder jobs directory
+        """
+        paths = []
+        for root, dirs, files in os.walk(self.folder_jobs_dir):
+            relative = os.path.relpath(root, self.folder_jobs_dir).replace(os.sep, '/')
+            for file_name in files:
+                if file_name.endswith('.xml'):
+                    paths.append(file_name[:-4] if relative == '.' else relative + '/' + file_name[:-4])
+        return sorted(paths)
+
+    def is_folder_config(self, file_name):
+        """
+        Check if a saved item config is a folder
+        """
+        try:
+            for event, element in ET.iterparse(file_name, events=('start',)):
+                return element.tag == FOLDER_CLASS or element.tag.endswith('.Folder')
+        except ET.ParseError:
+            return False
+        return False
+
+    def restore_plan(self):
+        """
+        Order restore work into dependency levels: global config, plugins, folders
+        from the top down, jobs, views (which reference jobs) and nodes
+        """
+        levels = [[RestoreItem('config', name) for name in self.list_xml(self.config_dir)],
+                  [RestoreItem('plugin', name) for name in self.list_xml(self.plugins_dir)]]
+        folders = {}
+        jobs = []
+        for name in self.list_xml(self.jobs_dir):
+            item = RestoreItem('job', name, '', os.path.join(self.jobs_dir, name + '.xml'))
+            if self.is_folder_config(item.file_name):
+                folders.setdefault(1, []).append(item)
+            else:
+                jobs.append(item)
+        folder_jobs = None
+        for path in self.list_folder_jobs():
+            folder_name, _, name = path.rpartition('/')
+            if not folder_name:
+                # flat layout of older backups, the folder comes from FolderJobs
+                if folder_jobs is None:
+                    folder_jobs = self.read_backup_manifest("FolderJobs") or {}
+                if name not in folder_jobs:
+                    print('{}: folder unknown, not restored'.format(name))
+                    continue
+                folder_name = folder_jobs[name]
+            item = RestoreItem('job', name, folder_name, os.path.join(self.folder_jobs_dir, *path.split('/')) + '.xml')
+            if self.is_folder_config(item.file_name):
+                folders.setdefault(item.folder.count('/') + 2, []).append(item)
+            else:
+                jobs.append(item)
+        levels += [folders[depth] for depth in sorted(folders)]
+        levels.append(jobs)
+        levels.append([RestoreItem('view', name) for name in self.list_xml(self.views_dir)])
+        levels.append([RestoreItem('node', name) for name in self.list_xml(self.nodes_dir)])
+        if self.selection is not None:
+            levels = [[item for item in level if self.restore_selected(item)] for level in levels]
+        return [level for level in levels if level]
+
+    def restore_selected(self, item):
+        """
+        Check a planned RestoreItem against the --include/--exclude/--types selection
+        """
+        kind = item.kind
+        if kind == 'job' and self.is_folder_config(item.file_name):
+            kind = 'folder'
+        if kind == 'config':
             return True
+        return self.selection.matches(kind, item.folder + '/' + item.name if item.folder else item.name)
+
+    def create_item_in_folder(self, folder_path, item_name, file_name, item_config=None):
+        """
+        Create job or folder inside a folder path, at the top level for an empty path
+        """
+        try:
+            if item_config is None:
+                with open(file_name, 'r') as f:
+                    item_config = f.read()
+            parent = job_url_path(folder_path) if folder_path else ''
+            response = self.session.post(self.url + parent + '/createItem?name=' + item_name, data=item_config)
+            return response.ok
+        except Exception as e:
+            print(e)
+            return False
+
+    def restore_item(self, item):
+        """
+        Restore one planned item inside a controller slot
+        """
+        with self.get_controller_slots():
+            try:
+                if item.kind == 'config':
+                    return self.create_config(item.name)
+                if item.kind == 'plugin':
+                    return self.create_plugin(item.name)
+                if item.kind == 'view':
+                    return self.create_view(item.name)
+                if item.kind == 'node':
+                    return self.create_node(item.name)
+                return self.create_item_in_folder(item.folder, item.name, item.file_name)
+            except Exception as e:
+                print(e)
+                return False
+
+    def config_digest(self, config):
+        """
+        sha256 of a config, ignoring line endings and surrounding whitespace
+        """
+        return hashlib.sha256(config.replace('\r\n', '\n').strip().encode('utf-8')).hexdigest()
+
+    def live_config_url(self, item):
+        """
+        Where the target controller serves (and accepts updates of) the config of a planned item
+        """
+        if item.kind == 'config':
+            return self.url + '/config.xml'
+        if item.kind == 'view':
+            return self.url + '/view/' + item.name + '/config.xml'
+        if item.kind == 'node':
+            return self.url + '/computer/' + item.name + '/config.xml'
+        return self.url + job_url_path(item.folder + '/' + item.name if item.folder else item.name) + '/config.xml'
+
+    def saved_config_file(self, item):
+        """
+        Backup file of a planned item
+        """
+        if item.file_name is not None:
+            return item.file_name
+        dirs = {'config': self.config_dir, 'plugin': self.plugins_dir, 'view': self.views_dir, 'node': self.nodes_dir}
+        return os.path.join(dirs[item.kind], item.name + '.xml')
+
+    def installed_plugins(self):
+        """
+        Short names of the plugins on the target, one bulk query cached for the run
+        """
+        with self.reconcile_lock:
+            if self.live_plugins is None:
+                response = self.session.get(self.url + '/pluginManager/api/json?tree=plugins[shortName]')
+                self.live_plugins = set(plugin['shortName'] for plugin in response.json()['plugins'])
+            return self.live_plugins
+
+    def count_reconciled(self, action):
+        """
+        Count a reconcile outcome: created, updated, unchanged or failed
+        """
+        with self.reconcile_lock:
+            self.reconciled[action] = self.reconciled.get(action, 0) + 1
+
+    def create_reconciled(self, item):
+        """
+        Create an item missing on the target, counted as created only once the write succeeded
+        """
+        ok = self.restore_item(item)
+        self.count_reconciled('created' if ok else 'failed')
+        return ok
+
+    def reconcile_item(self, item):
+        """
+        Restore a planned item only if the target lacks it or holds a different config:
+        missing items are created, different ones updated in place, identical ones skipped.
+        Plugins are reconciled by presence only
+        """
+        try:
+            if item.kind == 'plugin':
+                # plugins are reconciled by presence only, the backup records no version to compare
+                if item.name in self.installed_plugins():
+                    self.count_reconciled('unchanged')
+                    return True
+                return self.create_reconciled(item)
+            with open(self.saved_config_file(item), 'r') as config_file:
+                saved = config_file.read()
+            url = self.live_config_url(item)
+            with self.get_controller_slots():
+                response = self.session.get(url)
+            if response.status_code == 404:
+                return self.create_reconciled(item)
+            if not response.ok:
+                print('{}: HTTP {} reading the live config'.format(url, response.status_code))
+                self.count_reconciled('failed')
+                return False
+            if self.config_digest(response.text) == self.config_digest(saved):
+                self.count_reconciled('unchanged')
+                return True
+            with self.get_controller_slots():
+                response = self.session.post(url, data=saved.encode('utf-8'))
+            self.count_reconciled('updated' if response.ok else 'failed')
+            return response.ok
+        except Exception as e:
+            print(e)
+            self.count_reconciled('failed')
+            return False
+
+    def restore_scheduled(self, workers=None):
+        """
+        Restore level by level, items within a level concurrently on a bounded pool.
+        In reconcile mode only missing or different items are written
+        """
+        if workers is None:
+            workers = self.workers
+        workers = max(1, min(workers, self.max_workers))
+        restore = self.reconcile_item if self.reconcile else self.restore_item
+        results = []
+        for level in self.restore_plan():
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                results += list(executor.map(lambda item: self.checkpointed(item.kind, item.folder + '/' + item.name, restore, item,
+                                                                            folder=item.kind == 'job' and self.is_folder_config(item.file_name)), level))
+        if self.reconcile:
+            print('reconcile: {} created, {} updated, {} unchanged, {} failed'.format(*(self.reconciled.get(action, 0) for action in ('created', 'updated', 'unchanged', 'failed'))))
+        return all(results)
+
+class AsyncMyJenkins():
+    """
+    asyncio client for the MyJenkins endpoints, backed by one pooled keep-alive aiohttp session
+    """
+    def __init__(self, args, jenkins=None):
+        if aiohttp is None:
+            raise ImportError('aiohttp is required for --async: pip install aiohttp')
+        # reuse MyJenkins for settings, backup layout, details.json and a --stream_archive writer
+        self.jenkins = jenkins if jenkins is not None else MyJenkins(args)
+        self.url = self.jenkins.url
+        self.loggers = self.jenkins.loggers
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        """
+        Open the pooled HTTP session, at most max_workers connections to the controller
+        """
+        connector = aiohttp.TCPConnector(limit=self.jenkins.max_workers, ssl=False, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(
+            auth=aiohttp.BasicAuth(self.jenkins.username, self.jenkins.token),
+            headers={'Content-Type':'text/xml'},
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.jenkins.session.timeout, sock_read=self.jenkins.session.timeout))
+
+    async def close(self):
+        """
+        Close the HTTP session
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def fetch(self, path, read):
+        """
+        GET path through the RateLimiter and RetryPolicy of the sync session, so --rate,
+        --target_latency, --retries and the adaptive concurrency limit hold under --async too.
+        The slot is held until read(response) has consumed the body
+        """
+        limiter = self.jenkins.session.limiter
+        retry = self.jenkins.session.retry
+        for attempt in range(retry.attempts):
+            last_attempt = attempt == retry.attempts - 1
+            await limiter.acquire_async()
+            started = time.monotonic()
+            status = None
+            retry_after = None
+            try:
+                async with self.session.get(self.url + path) as response:
+                    status = response.status
+                    retry_after = RetryPolicy.retry_after(response.headers)
+                    if status not in retry.statuses or last_attempt:
+                        if status in retry.statuses:
+                            print('GET {} failed after {} attempt(s): HTTP {}'.format(self.url + path, attempt + 1, status))
+                        return await read(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    print('GET {} failed after {} attempt(s): {}'.format(self.url + path, attempt + 1, e))
+                    raise
+            finally:
+                limiter.release(time.monotonic() - started, status, retry_after)
+            await asyncio.sleep(retry.delay(attempt, retry_after))
+
+    async def get_text(self, path):
+        """
+        Get text, None on a non-2xx status so error pages are never saved as configs
+        """
+        async def read(response):
+            if not 200 <= response.status < 300:
+                return None
+            return await response.text()
+        try:
+            return await self.fetch(path, read)
+        except:
+            return None
+
+    async def get_json(self, path):
+        """
+        Get json, None on a non-2xx status
+        """
+        async def read(response):
+            if not 200 <= response.status < 300:
+                return None
+            return await response.json(content_type=None)
+        try:
+            return await self.fetch(path, read)
         except:
+            return None
+
+    async def get_jobs(self):
+        """
+        Get all jobs
+        """
+        data = await self.get_json('/api/json')
+        return data['jobs'] if data else []
+
+    async def get_jobs_by_folder(self, folder_name):
+        """
+        Get jobs by folder
+        """
+        data = await self.get_json(job_url_path(folder_name) + '/api/json')
+        return data['jobs'] if data else []
+
+    async def get_views(self):
+        """
+        Get all views
+        """
+        data = await self.get_json('/view/all/api/json')
+        return data['views'] if data else []
+
+    async def get_nodes(self):
+        """
+        Get all nodes
+        """
+        data = await self.get_json('/computer/api/json')
+        return data['computer'] if data else []
+
+    async def get_plugins(self):
+        """
+        Get all plugins
+        """
+        data = await self.get_json('/pluginManager/api/json')
+        return data['plugins'] if data else []
+
+    async def get_job_config(self, job_name):
+        """
+        Get job config
+        """
+        return await self.get_text('/job/' + job_name + '/config.xml')
+
+    async def get_folder_job_config(self, folder_name, job_name):
+        """
+        Get folder job config
+        """
+        return await self.get_text(job_url_path(folder_name) + '/job/' + job_name + '/config.xml')
+
+    async def get_view_config(self, view_name):
+        """
+        Get view config
+        """
+        return await self.get_text('/view/' + view_name + '/config.xml')
+
+    async def get_node_config(self, node_name):
+        """
+        Get node config
+        """
+        return await self.get_text('/computer/' + node_name + '/config.xml')
+
+    async def get_plugin_config(self, plugin_name):
+        """
+        Get plugin config
+        """
+        return await self.get_text('/pluginManager/plugin/' + plugin_name + '/config.xml')
+
+    async def get_config(self):
+        """
+        Get config
+        """
+        return await self.get_text('/config.xml')
+
+    async def get_job_last_build(self, job_name):
+        """
+        Get job last build
+        """
+        return await self.get_json('/job/' + job_name + '/lastBuild/api/json')
+
+    async def get_job_build_log(self, job_name, build_number):
+        """
+        Get job build log
+        """
+        return await self.get_text('/job/' + job_name + '/' + str(build_number) + '/logText/progressiveText')
+
+    async def save(self, path, content, parentkey, key, value):
+        """
+        Write a fetched item and record it in details.json, off the event loop
+        """
+        await asyncio.to_thread(self.jenkins.write_backup_file, path, content)
+        await asyncio.to_thread(self.jenkins.write_json_file, "details.json", parentkey, key, value)
+
+    async def backup_job(self, job_name):
+        """
+        Backup job
+        """
+        job_config = await self.get_job_config(job_name)
+        if job_config is None:
             return False
-if __name__ == '__main__':
+        await self.save(os.path.join(self.jenkins.jobs_dir, job_name + '.xml'), job_config, "Jobs", job_name, (self.jenkins.jobs_dir, job_name + '.xml'))
+        if self.loggers:
+            await self.backup_log(job_name)
+        return True
+
+    async def stream_to_files(self, path, file_names):
+        """
+        Stream a response body chunk by chunk to one or more files, or through a spool into
+        the --stream_archive, so a console log is never held in memory.
+        Returns the number of bytes written or None
+        """
+        archive = self.jenkins.archive
+        def open_files():
+            if archive is not None:
+                return [tempfile.SpooledTemporaryFile(max_size=archive.spool_size)]
+            return [open(file_name, 'wb') for file_name in file_names]
+        def write_chunk(files, chunk):
+            for file_to_write in files:
+                file_to_write.write(chunk)
+        async def copy(response):
+            if not 200 <= response.status < 300:
+                return None
+            files = await asyncio.to_thread(open_files)
+            written = 0
+            try:
+                async for chunk in response.content.iter_chunked(self.jenkins.log_chunk_size):
+                    # one thread hop per chunk, whatever the number of files
+                    await asyncio.to_thread(write_chunk, files, chunk)
+                    written += len(chunk)
+                if archive is not None:
+                    await asyncio.to_thread(archive.copy_from, [self.jenkins.archive_member_name(file_name) for file_name in file_names], files[0])
+            finally:
+                for file_to_write in files:
+                    file_to_write.close()
+            return written
+        return await self.fetch(path, copy)
+
+    async def backup_log(self, job_name):
+        """
+        Backup job last build log, streamed like MyJenkins.backup_log
+        """
+        last_build = await self.get_job_last_build(job_name)
+        if not last_build:
+            return False
+        file_names = [os.path.join(self.jenkins.jobs_log_dir, job_name + '.log'), os.path.join(self.jenkins.jobs_log_dir, job_name + '.xml')]
+        try:
+            written = await self.stream_to_files('/job/' + job_name + '/' + str(last_build['number']) + '/logText/progressiveText', file_names)
+        except Exception as e:
+            print(e)
+            return False
+        if not written:
+            return False
+        await asyncio.to_thread(self.jenkins.write_json_file, "details.json", "JobLogs", job_name, (self.jenkins.jobs_log_dir, job_name + '.xml'))
+        return True
+
+    async def backup_folder_job(self, folder_name, job_name):
+        """
+        Backup folder job
+        """
+        job_config = await self.get_folder_job_config(folder_name, job_name)
+        if job_config is None:
+            return False
+        file_name = self.jenkins.folder_job_file(folder_name, job_name)
+        await self.save(file_name, job_config, "Folder", folder_name, {job_name:(os.path.dirname(file_name), job_name + '.xml')})
+        await asyncio.to_thread(self.jenkins.write_json_file, "details.json", "FolderJobs", folder_name + '/' + job_name, folder_name)
+        return True
+
+    async def backup_folder(self, folder_name):
+        """
+        Backup everything nested in a folder path, subfolders included
+        """
+        jobs = await self.get_jobs_by_folder(folder_name)
+        tasks = []
+        for job in jobs:
+            tasks.append(self.backup_folder_job(folder_name, job['name']))
+            if job.get('_class') == FOLDER_CLASS:
+                tasks.append(self.backup_folder(folder_name + '/' + job['name']))
+        results = await asyncio.gather(*tasks)
+        return all(results)
+
+    async def backup_view(self, view_name):
+        """
+        Backup view
+        """
+        view_config = await self.get_view_config(view_name)
+        if view_config is None:
+            return False
+        await self.save(os.path.join(self.jenkins.views_dir, view_name + '.xml'), view_config, "Views", view_name, (self.jenkins.views_dir, view_name + '.xml'))
+        return True
+
+    async def backup_node(self, node_name):
+        """
+        Backup node
+        """
+        node_config = await self.get_node_config(node_name)
+        if node_config is None:
+            return False
+        await self.save(os.path.join(self.jenkins.nodes_dir, node_name + '.xml'), node_config, "Nodes", node_name, (self.jenkins.nodes_dir, node_name + '.xml'))
+        return True
+
+    async def backup_plugin(self, plugin_name):
+        """
+        Backup plugin
+        """
+        plugin_config = await self.get_plugin_config(plugin_name)
+        if plugin_config is None:
+            return False
+        await self.save(os.path.join(self.jenkins.plugins_dir, plugin_name + '.xml'), plugin_config, "Plugins", plugin_name, (self.jenkins.plugins_dir, plugin_name + '.xml'))
+        return True
+
+    async def backup_config(self):
+        """
+        Backup global config
+        """
+        config = await self.get_config()
+        if config is None:
+            return False
+        await self.save(os.path.join(self.jenkins.config_dir, 'config.xml'), config, "Config", "config", os.path.join(self.jenkins.config_dir, 'config.xml'))
+        return True
 
+    async def backup_all(self):
+        """
+        Backup all, every item request in flight at once over the shared connection pool
+        """
+        async with self:
+            jobs, views, nodes, plugins = await asyncio.gather(self.get_jobs(), self.get_views(), self.get_nodes(), self.get_plugins())
+            tasks = [self.backup_config()]
+            for job in jobs:
+                # a top level folder is saved with the jobs, as the sync backup_all_jobs does
+                tasks.append(self.backup_job(job['name']))
+                if job.get('_class') == FOLDER_CLASS:
+                    tasks.append(self.backup_folder(job['name']))
+            tasks += [self.backup_view(view['name']) for view in views]
+            tasks += [self.backup_node(node['displayName']) for node in nodes]
+            tasks += [self.backup_plugin(plugin['shortName']) for plugin in plugins]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        result = all(result is True for result in results)
+        if result:
+            await asyncio.to_thread(self.jenkins.record_removed_items)
+        await asyncio.to_thread(self.jenkins.flush_manifests)
+        return result
+
+def positive_float(value):
+    """
+    argparse type for options that must be greater than zero
+    """
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError('must be greater than 0: ' + value)
+    return number
+
+def item_types(value):
+    """
+    argparse type for --types: comma separated Selection types
+    """
+    kinds = [kind.strip() for kind in value.split(',') if kind.strip()]
+    unknown = sorted(set(kinds) - set(Selection.types))
+    if not kinds or unknown:
+        raise argparse.ArgumentTypeError('expected {}, got: {}'.format(','.join(Selection.types), value))
+    return kinds
+
+def validate_args(argparser, args):
+    """
+    Reject option combinations that would otherwise be silently ignored
+    """
+    if args.use_async and (not args.backup or not args.all or args.include or args.exclude or args.types):
+        argparser.error('--async only applies to a full backup (-b -a) without --include, --exclude or --types')
+    if args.catalog_at and not args.catalog_history:
+        argparser.error('--catalog_at needs --catalog_history (-ch)')
+    if args.stream_archive and (args.compression_report or args.compression_workers is not None):
+        argparser.error('--compression_report and --compression_workers need the staging directory, not available with --stream_archive')
+
+def build_argparser():
+    """
+    Command line options of main_jenkins.py, also used to configure MyJenkins from other scripts
+    """
     argparser = argparse.ArgumentParser(description='Jenkins backup and restore')
     argparser.add_argument('-b', '--backup', help='Backup Jenkins', action='store_true')
     argparser.add_argument('-r', '--restore', help='Restore Jenkins', action='store_true')
@@ -2116,6 +5202,20 @@ if __name__ == '__main__':
     argparser.add_argument('-ep', '--allpluginsexcept', help='Backup all plugins except')
     argparser.add_argument('-ev', '--allviewsexcept', help='Backup all views except')
 
+    argparser.add_argument('-in', '--include', help="Select items whose folder path matches a glob ('team-*/release/**') or 're:<regex>', repeatable", action='append')
+    argparser.add_argument('-ex', '--exclude', help='Skip items matching a glob or re:<regex>, repeatable', action='append')
+    argparser.add_argument('-ty', '--types', help='Comma separated item types to select: ' + ','.join(Selection.types), type=item_types)
+
+    argparser.add_argument('-df', '--diff', help='Compare two backup archives: added, removed and changed items', nargs=2, metavar=('OLD', 'NEW'))
+    argparser.add_argument('-dc', '--diff_content', help='With --diff also print a unified diff of the changed configs', action='store_true')
+
+    argparser.add_argument('-cat', '--catalog', help='SQLite catalog indexing every archive this script writes')
+    argparser.add_argument('-ci', '--catalog_index', help='Index existing archives into --catalog', nargs='+', metavar='ZIP')
+    argparser.add_argument('-ch', '--catalog_history', help='List every archived version of an item (folder path or name) from --catalog', metavar='ITEM')
+    argparser.add_argument('-ca', '--catalog_at', help='With -ch show the version at or before this time (e.g. 2026-10-18T23:59)', metavar='TIMESTAMP')
+
+    argparser.add_argument('-rc', '--reconcile', help='Restore only items missing or different on the target, update changed ones in place; plugins are checked by presence only', action='store_true')
+
     argparser.add_argument('-u', '--url', help='Jenkins URL')
     argparser.add_argument('-un', '--username', help='Jenkins username')
     argparser.add_argument('-t', '--token', help='Jenkins token')
@@ -2125,54 +5225,113 @@ if __name__ == '__main__':
     argparser.add_argument('-zd', '--zip_dir', help='Zip directory')
     argparser.add_argument('-z', '--zip', help='Zip file')
 
+    argparser.add_argument('-w', '--workers', help='Number of concurrent backup workers', type=int)
+    argparser.add_argument('-mw', '--max_workers', help='Maximum concurrent requests per Jenkins controller', type=int)
+    argparser.add_argument('-rps', '--rate', help='Maximum requests per second to the controller', type=positive_float)
+    argparser.add_argument('-tl', '--target_latency', help='Response seconds above which concurrency is reduced (default 2)', type=positive_float)
+    argparser.add_argument('-rt', '--retries', help='Retries of a failed GET with exponential backoff (default 3)', type=int)
+    argparser.add_argument('-rs', '--resume', help='Checkpoint finished items and resume an interrupted backup or restore', action='store_true')
+    argparser.add_argument('-qs', '--queue_size', help='Items buffered between backup pipeline stages (default 4 per worker)', type=int)
+    argparser.add_argument('-bn', '--builds', help='With -l back up the consoles of the last N builds of each job', type=int)
+    argparser.add_argument('-bs', '--since', help='With -l back up the consoles of every build since YYYY-MM-DD')
+    argparser.add_argument('-pr', '--perf_report', help='Print latency percentiles per endpoint, slowest requests and throughput', action='store_true')
+    argparser.add_argument('-pj', '--perf_json', help='Export per-request timings to this JSON file')
+    argparser.add_argument('-mf', '--metrics_file', help='Write run metrics to this Prometheus textfile collector file (*.prom)')
+    argparser.add_argument('-mp', '--metrics_port', help='Serve run metrics on http://localhost:PORT/metrics while running', type=int)
+    argparser.add_argument('-pf', '--profile', help='Profile the backup or restore and write the report next to the archive', choices=Profiler.modes)
+    argparser.add_argument('-pd', '--profile_dir', help='Directory for the --profile reports (default: the zip directory)')
+    argparser.add_argument('-mj', '--manifest_journal', help='Journal details.json entries to details.jsonl while backing up', action='store_true')
+    argparser.add_argument('-il', '--incremental_logs', help='Only fetch console output added since the previous backup', action='store_true')
+    argparser.add_argument('-i', '--incremental', help='Back up only configs changed since the previous backup; restore layers incrementals over the base', action='store_true')
+    argparser.add_argument('-sd', '--store', help='Content-addressed store directory for deduplicated backups')
+    argparser.add_argument('-ks', '--keep_snapshots', help='Snapshots to keep in the content store (default 30)', type=int)
+    argparser.add_argument('-ss', '--snapshot', help='Store snapshot to restore (default newest)')
+    argparser.add_argument('-sa', '--stream_archive', help='Write items straight into the zip without a staging directory', action='store_true')
+    argparser.add_argument('-c', '--compression', help='Archive codec (default deflate)', choices=sorted(COMPRESSION_CODECS))
+    argparser.add_argument('-cl', '--compression_level', help='Codec compression level', type=int)
+    argparser.add_argument('-cw', '--compression_workers', help='Threads compressing archive members in parallel', type=int)
+    argparser.add_argument('-cr', '--compression_report', help='Print ratio and time of every codec on the backup', action='store_true')
+    argparser.add_argument('--async', dest='use_async', help='Use the asyncio client (requires aiohttp)', action='store_true')
+    return argparser
+
+if __name__ == '__main__':
+
+    argparser = build_argparser()
     args = argparser.parse_args()
+    validate_args(argparser, args)
     print('Backup Jenkins',args.all)
-    myJenkins=MyJenkins(args)
-    print(myJenkins.backup_all_jobs())
-    if args.backup:
+    # offline subcommands only read archives, so no Jenkins client is created for them
+    if args.diff:
+        ArchiveDiff(args.diff[0], args.diff[1]).report(args.diff_content)
+    elif args.catalog and (args.catalog_index or args.catalog_history):
+        catalog = Catalog(args.catalog)
+        try:
+            for zip_file_name in args.catalog_index or []:
+                print('{}: {} items indexed'.format(zip_file_name, catalog.index_archive(zip_file_name)))
+            kinds = args.types
+            if args.catalog_history and args.catalog_at:
+                catalog.at(args.catalog_history, args.catalog_at, kinds)
+            elif args.catalog_history:
+                catalog.history(args.catalog_history, kinds)
+        finally:
+            catalog.close()
+    elif args.backup:
+        myJenkins=MyJenkins(args)
         myJenkins.create_backup_dir()
-        try:
-            if args.all:
+        myJenkins.open_checkpoint('backup')
+        myJenkins.open_metrics('backup')
+        myJenkins.start_profiler('backup')
+        myJenkins.metrics_phase('fetch')
+        completed = False
+        results = []
+        try:
+            if myJenkins.selection is not None:
+                results.append(myJenkins.backup_selected())
+            elif args.all and args.use_async:
+                results.append(asyncio.run(AsyncMyJenkins(args, myJenkins).backup_all()))
+            elif args.all:
                 counter = 0
                 if args.folder==True:
                     counter+=1
-                    myJenkins.backup_all_folder()
+                    results.append(myJenkins.backup_all_folder())
                 if args.view==True:
                     counter+=1
-                    myJenkins.backup_all_views()
+                    results.append(myJenkins.backup_all_views())
                 if args.job == True:
                     counter+=1
-                    myJenkins.backup_all_jobs()
+                    results.append(myJenkins.backup_all_jobs())
                 if args.plugin==True:
                     counter+=1
-                    myJenkins.backup_all_plugins()
+                    results.append(myJenkins.backup_all_plugins())
                 if args.log==True:
                     counter+=1
-                    myJenkins.backup_all_logs()
+                    results.append(myJenkins.backup_all_logs())
                 
                 if counter == 0:
-                    myJenkins.backup_all()
+                    results.append(myJenkins.backup_all())
             elif args.filteredjob:
-                myJenkins.backup_job(args.filteredjob)
+                results.append(myJenkins.backup_job(args.filteredjob))
             elif args.filteredfolder:
-                myJenkins.backup_folder(args.filteredfolder)
+                results.append(myJenkins.backup_folder(args.filteredfolder))
             elif args.filteredplugin:
-                myJenkins.backup_plugin(args.filteredplugin)
+                results.append(myJenkins.backup_plugin(args.filteredplugin))
             elif args.filteredview:
-                myJenkins.backup_view(args.filteredview) 
+                results.append(myJenkins.backup_view(args.filteredview))
             elif args.filterednode:
-                myJenkins.backup_node(args.filterednode)     
+                results.append(myJenkins.backup_node(args.filterednode))
             elif args.alljobsexcept: 
-                myJenkins.backup_all_jobs_except_job(args.alljobsexcept)  
+                results.append(myJenkins.backup_all_jobs_except_job(args.alljobsexcept))
             elif args.allfoldersexcept:
-                myJenkins.backup_all_folder_except_folder(args.allfoldersexcept)
+                results.append(myJenkins.backup_all_folder_except_folder(args.allfoldersexcept))
             elif args.allpluginsexcept:
-                myJenkins.backup_all_plugins_except_plugin(args.allpluginsexcept)
+                results.append(myJenkins.backup_all_plugins_except_plugin(args.allpluginsexcept))
             elif args.allviewsexcept:
-                myJenkins.backup_all_views_except_view(args.allviewsexcept)
+                results.append(myJenkins.backup_all_views_except_view(args.allviewsexcept))
             
             else:
                 print('Please select what to backup')
+            # an item that failed leaves the checkpoint in place so --resume retries it
+            completed = False not in results
         except:
             pass
         finally:
@@ -2184,49 +5343,103 @@ if __name__ == '__main__':
             #     myJenkins.zip_file = os.path.join(myJenkins.zip_dir, 'backup.zip') 
             # else:
             #     myJenkins.zip_file = os.path.join(self.zip_dir, args.zip)
-            myJenkins.compress_all_files_in_dir(myJenkins.zip_file,myJenkins.backup_dir)
-            myJenkins.remove_all_files_in_dir(myJenkins.backup_dir)
+            if args.rate is not None:
+                myJenkins.print_rate_limiter_status()
+            myJenkins.metrics_phase('manifest')
+            myJenkins.flush_manifests()
+            myJenkins.write_manifest_to_backup()
+            if myJenkins.checkpoint is not None and not completed:
+                print('backup interrupted, staging directory kept, run again with --resume')
+            else:
+                myJenkins.metrics_phase('archive')
+                myJenkins.commit_store_snapshot()
+                if myJenkins.archive is not None:
+                    myJenkins.close_archive()
+                else:
+                    if args.compression_report:
+                        myJenkins.compression_report(myJenkins.backup_dir, compresslevel=myJenkins.compression_level)
+                    archive_file = myJenkins.prepare_archive()
+                    myJenkins.compress_all_files_in_dir(archive_file,myJenkins.backup_dir)
+                    if myJenkins.metrics is not None:
+                        myJenkins.metrics.archive_file = archive_file
+                    myJenkins.catalog_archive(archive_file)
+                    myJenkins.remove_all_files_in_dir(myJenkins.backup_dir)
+                myJenkins.close_checkpoint()
+            myJenkins.close_build_executor()
+            myJenkins.report_request_stats()
+            myJenkins.close_metrics(completed)
+            myJenkins.stop_profiler()
     elif args.restore:
-        if args.restore_dir is None:
+        myJenkins=MyJenkins(args)
+        myJenkins.open_checkpoint('restore')
+        myJenkins.open_metrics('restore')
+        myJenkins.start_profiler('restore')
+        myJenkins.metrics_phase('extract')
+        if myJenkins.store is not None:
+            myJenkins.store.materialize(myJenkins.backup_dir, args.snapshot)
+        elif args.restore_dir is None and args.incremental:
+            myJenkins.decompress_incremental_chain()
+        elif args.restore_dir is None and not args.all and myJenkins.selection is None and (args.filteredjob or args.filteredview or args.filterednode or (args.plugin and args.filteredplugin)) and os.path.exists(myJenkins.zip_file):
+            # single item: read it straight from the archive instead of extracting everything
+            myJenkins.restore_from_archive = True
+        elif args.restore_dir is None:
             myJenkins.decompress_all_files_in_dir(myJenkins.zip_file,myJenkins.restore_dir)
-        if args.all:
-            counter = 0
-            if args.folder:
-                counter+=1
-                myJenkins.restore_all_folders()
-            if args.view:
-                counter+=1
-                myJenkins.restore_all_views()
-            if args.job:
-                counter+=1
-                myJenkins.restore_all_jobs()
-            if args.plugin:
-                counter+=1
-                myJenkins.restore_all_plugins()
+        myJenkins.metrics_phase('restore')
+        completed = False
+        results = []
+        try:
+            if myJenkins.selection is not None:
+                results.append(myJenkins.restore_all())
+            elif args.all:
+                counter = 0
+                if args.folder:
+                    counter+=1
+                    results.append(myJenkins.restore_all_folders())
+                if args.view:
+                    counter+=1
+                    results.append(myJenkins.restore_all_views())
+                if args.job:
+                    counter+=1
+                    results.append(myJenkins.restore_all_jobs())
+                if args.plugin:
+                    counter+=1
+                    results.append(myJenkins.restore_all_plugins())
+                
+                if counter == 0:
+                    results.append(myJenkins.restore_all())
+            elif args.filteredjob:
+                results.append(myJenkins.restore_job(args.filteredjob))
+            elif args.filteredfolder:
+                results.append(myJenkins.restore_folder(args.filteredfolder))
+            elif args.plugin:
+                results.append(myJenkins.restore_plugin(args.filteredplugin))
+            elif args.filteredview:
+                results.append(myJenkins.restore_view(args.filteredview))
+            elif args.filterednode:
+                results.append(myJenkins.restore_node(args.filterednode))
+            elif args.alljobsexcept:
+                results.append(myJenkins.restore_all_jobs_except_job(args.alljobsexcept))
+            elif args.allfoldersexcept:
+                results.append(myJenkins.restore_all_folders_except_folder(args.allfoldersexcept))
+            elif args.allpluginsexcept:
+                results.append(myJenkins.restore_all_plugins_except_plugin(args.allpluginsexcept))
+            elif args.allviewsexcept:
+                results.append(myJenkins.restore_all_views_except_view(args.allviewsexcept))
             
-            if counter == 0:
-                myJenkins.restore_all()
-        elif args.filteredjob:
-            myJenkins.restore_job(args.filteredjob)
-        elif args.filteredfolder:
-            myJenkins.restore_folder(args.filteredfolder)
-        elif args.plugin:
-            myJenkins.restore_plugin(args.filteredplugin)
-        elif args.filteredview:
-            myJenkins.restore_view(args.filteredview)
-        elif args.filterednode:
-            myJenkins.restore_node(args.filterednode)    
-        elif args.alljobsexcept:
-            myJenkins.restore_all_jobs_except_job(args.alljobsexcept)
-        elif args.allfoldersexcept:
-            myJenkins.restore_all_folders_except_folder(args.allfoldersexcept)
-        elif args.allpluginsexcept:
-            myJenkins.restore_all_plugins_except_plugin(args.allpluginsexcept)
-        elif args.allviewsexcept:
-            myJenkins.restore_all_views_except_view(args.allviewsexcept)
-        
-        else:
-            print('Please select what to restore')
+            else:
+                print('Please select what to restore')
+            # a failed item keeps the checkpoint so --resume retries it
+            completed = False not in results
+        except Exception as e:
+            print(e)
+        finally:
+            if myJenkins.checkpoint is not None and not completed:
+                print('restore incomplete, run again with --resume')
+            else:
+                myJenkins.close_checkpoint()
+            myJenkins.report_request_stats()
+            myJenkins.close_metrics(completed)
+            myJenkins.stop_profiler()
             
             
 
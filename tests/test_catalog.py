@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_jenkins import Catalog
+
+
+def write_archive(file_name, members, manifest=None):
+    with zipfile.ZipFile(file_name, 'w') as zip_file:
+        zip_file.writestr('backup/details.json', json.dumps(manifest or {}))
+        for member, content in members.items():
+            zip_file.writestr('backup/' + member, content)
+
+
+class CatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.catalog = Catalog(os.path.join(self.directory.name, 'catalog.db'))
+
+    def tearDown(self):
+        self.catalog.close()
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_index_counts_items_and_skips_manifest(self):
+        write_archive(self.path('one.zip'), {'jobs/a.xml': '<a/>', 'plugins/git.xml': '<git/>'})
+        self.assertEqual(self.catalog.index_archive(self.path('one.zip'), '2026-01-01T00:00:00'), 2)
+        self.assertEqual([version['kind'] for version in self.catalog.query_item('git')], ['plugin'])
+
+    def test_reindex_replaces_earlier_rows(self):
+        write_archive(self.path('one.zip'), {'jobs/a.xml': '<a/>'})
+        self.catalog.index_archive(self.path('one.zip'), '2026-01-01T00:00:00')
+        self.catalog.index_archive(self.path('one.zip'), '2026-01-02T00:00:00')
+        versions = self.catalog.query_item('a')
+        self.assertEqual(len(versions), 1)
+        self.assertEqual(versions[0]['snapshot'], '2026-01-02T00:00:00')
+
+    def test_history_is_newest_first_and_at_picks_version_in_time(self):
+        write_archive(self.path('old.zip'), {'jobs/a.xml': '<old/>'})
+        write_archive(self.path('new.zip'), {'jobs/a.xml': '<new/>'})
+        self.catalog.index_archive(self.path('old.zip'), '2026-01-01T00:00:00')
+        self.catalog.index_archive(self.path('new.zip'), '2026-02-01T00:00:00')
+        versions = self.catalog.query_item('a', kinds=['job'])
+        self.assertEqual([version['archive'] for version in versions], [self.path('new.zip'), self.path('old.zip')])
+        self.assertNotEqual(versions[0]['hash'], versions[1]['hash'])
+        self.assertEqual(self.catalog.query_item('a', before='2026-01-15T00:00')[0]['archive'], self.path('old.zip'))
+        self.assertEqual(self.catalog.query_item('a', before='2025-12-31T00:00'), [])
+
+    def test_manifest_hash_is_used_when_recorded(self):
+        write_archive(self.path('one.zip'), {'jobs/a.xml': '<a/>'}, {'Hashes': {'jobs/a.xml': 'sha256:abc'}})
+        self.catalog.index_archive(self.path('one.zip'), '2026-01-01T00:00:00')
+        self.assertEqual(self.catalog.query_item('a')[0]['hash'], 'sha256:abc')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+import zlib
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main_jenkins
+from main_jenkins import MyJenkins, build_argparser
+
+
+class ParallelCompressionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backup_dir = os.path.join(self.directory.name, 'backup')
+        self.contents = {}
+        for index in range(12):
+            folder = os.path.join(self.backup_dir, 'jobs' if index % 2 else 'folder/jobs/team')
+            os.makedirs(folder, exist_ok=True)
+            content = ('<job id="{}">'.format(index) + 'x' * (index * 5000) + '</job>').encode('utf-8')
+            with open(os.path.join(folder, 'job{}.xml'.format(index)), 'wb') as job_file:
+                job_file.write(content)
+            self.contents['backup/' + os.path.relpath(os.path.join(folder, 'job{}.xml'.format(index)), self.backup_dir).replace(os.sep, '/')] = content
+        with open(os.path.join(self.backup_dir, 'jobs', 'déploiement.xml'), 'wb') as job_file:
+            job_file.write(b'<job/>')
+        self.contents['backup/jobs/déploiement.xml'] = b'<job/>'
+        self.zip_file_name = os.path.join(self.directory.name, 'backup.zip')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def jenkins(self, workers, *options):
+        return MyJenkins(build_argparser().parse_args(['-bd', self.backup_dir, '-cw', str(workers)] + list(options)))
+
+    def assert_archive_holds_backup(self):
+        with zipfile.ZipFile(self.zip_file_name, 'r') as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(sorted(zip_file.namelist()), sorted(self.contents))
+            for name, content in self.contents.items():
+                self.assertEqual(zip_file.read(name), content)
+
+    def test_parallel_archive_matches_backup(self):
+        for codec in ('deflate', 'bzip2', 'lzma', 'stored'):
+            jenkins = self.jenkins(4, '-c', codec)
+            self.assertTrue(jenkins.compress_all_files_in_dir_parallel(self.zip_file_name, self.backup_dir, 4))
+            self.assert_archive_holds_backup()
+
+    def test_more_workers_than_members(self):
+        self.assertTrue(self.jenkins(32).compress_all_files_in_dir_parallel(self.zip_file_name, self.backup_dir, 32))
+        self.assert_archive_holds_backup()
+
+    def test_zip64_records_read_back(self):
+        # members above ZIP64_LIMIT get zip64 sizes and offsets, lowered here to exercise them
+        with mock.patch.object(zipfile, 'ZIP64_LIMIT', 1000):
+            self.assertTrue(self.jenkins(4, '-c', 'deflate').compress_all_files_in_dir_parallel(self.zip_file_name, self.backup_dir, 4))
+        self.assert_archive_holds_backup()
+
+    def test_failed_member_falls_back_to_one_thread(self):
+        jenkins = self.jenkins(4)
+        compress_member = main_jenkins.compress_member
+        def broken_compress_member(file_name, *args, **kwargs):
+            if file_name.endswith('job7.xml'):
+                raise OSError('disk full')
+            return compress_member(file_name, *args, **kwargs)
+        with mock.patch.object(main_jenkins, 'compress_member', broken_compress_member):
+            self.assertFalse(jenkins.compress_all_files_in_dir_parallel(self.zip_file_name, self.backup_dir, 4))
+            jenkins.compress_all_files_in_dir(self.zip_file_name, self.backup_dir)
+        self.assert_archive_holds_backup()
+
+    def test_validate_archive_reads_only_the_central_directory(self):
+        jenkins = self.jenkins(4)
+        jenkins.compress_all_files_in_dir(self.zip_file_name, self.backup_dir)
+        expected = {name: (zlib.crc32(content), len(content)) for name, content in self.contents.items()}
+        self.assertTrue(jenkins.validate_archive(self.zip_file_name, expected))
+        self.assertFalse(jenkins.validate_archive(self.zip_file_name, dict(expected, **{'backup/jobs/extra.xml': (0, 0)})))
+        crc, size = expected['backup/jobs/job11.xml']
+        self.assertFalse(jenkins.validate_archive(self.zip_file_name, dict(expected, **{'backup/jobs/job11.xml': (crc ^ 1, size)})))
+        with open(self.zip_file_name, 'r+b') as zip_file:
+            zip_file.truncate(os.path.getsize(self.zip_file_name) - 10)
+        self.assertFalse(jenkins.validate_archive(self.zip_file_name, expected))
+
+if __name__ == '__main__':
+    unittest.main()
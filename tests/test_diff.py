@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_jenkins import ArchiveDiff
+
+
+def write_archive(file_name, members, manifest=None):
+    with zipfile.ZipFile(file_name, 'w') as zip_file:
+        zip_file.writestr('backup/details.json', json.dumps(manifest or {}))
+        for member, content in members.items():
+            zip_file.writestr('backup/' + member, content)
+
+
+class ArchiveDiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.old = os.path.join(self.directory.name, 'old.zip')
+        self.new = os.path.join(self.directory.name, 'new.zip')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def compare(self):
+        added, removed, changed = ArchiveDiff(self.old, self.new).compare()
+        return added, removed, [entry[0] for entry in changed]
+
+    def test_added_removed_and_changed_by_crc(self):
+        write_archive(self.old, {'jobs/a.xml': '<a>1</a>', 'jobs/b.xml': '<b/>', 'plugins/git.xml': '<git/>'})
+        write_archive(self.new, {'jobs/a.xml': '<a>2</a>', 'plugins/git.xml': '<git/>', 'views/all.xml': '<all/>'})
+        self.assertEqual(self.compare(), ([('view', 'all')], [('job', 'b')], [('job', 'a')]))
+
+    def test_same_size_different_content_is_changed(self):
+        write_archive(self.old, {'nodes/agent.xml': '<n>1</n>'})
+        write_archive(self.new, {'nodes/agent.xml': '<n>2</n>'})
+        self.assertEqual(self.compare(), ([], [], [('node', 'agent')]))
+
+    def test_manifest_hashes_take_precedence_over_crc(self):
+        write_archive(self.old, {'jobs/a.xml': '<a/>', 'jobs/b.xml': '<b/>'},
+                      {'Hashes': {'jobs/a.xml': 'sha-a', 'jobs/b.xml': 'sha-b1'}})
+        # a: bytes differ but the recorded hash is the same; b: same bytes, new hash
+        write_archive(self.new, {'jobs/a.xml': '<a />', 'jobs/b.xml': '<b/>'},
+                      {'Hashes': {'jobs/a.xml': 'sha-a', 'jobs/b.xml': 'sha-b2'}})
+        self.assertEqual(self.compare(), ([], [], [('job', 'b')]))
+
+    def test_crc_is_used_when_one_side_has_no_hash(self):
+        write_archive(self.old, {'jobs/a.xml': '<a/>'}, {'Hashes': {'jobs/a.xml': 'sha-a'}})
+        write_archive(self.new, {'jobs/a.xml': '<a/>'})
+        self.assertEqual(self.compare(), ([], [], []))
+
+    def test_flat_folder_jobs_resolve_to_their_folder_path(self):
+        write_archive(self.old, {'folder/jobs/build.xml': '<project/>', 'folder/jobs/team.xml': '<folder/>'},
+                      {'FolderJobs': {'build': 'team/release'}})
+        write_archive(self.new, {'folder/jobs/team/release/build.xml': '<project/>', 'folder/jobs/team/release/deploy.xml': '<project/>',
+                                 'folder/jobs/team.xml': '<folder/>'})
+        self.assertEqual(self.compare(), ([('job', 'team/release/deploy')], [], []))
+
+    def test_logs_keep_their_extension_and_skip_the_content_diff(self):
+        write_archive(self.old, {'jobs/log/a.log': 'one\n', 'folder/log/team/build7.log': 'one\n', 'jobs/a.xml': '<a>\n1\n</a>\n'})
+        write_archive(self.new, {'jobs/log/a.log': 'two\n', 'folder/log/team/build7.log': 'two\n', 'jobs/a.xml': '<a>\n2\n</a>\n'})
+        diff = ArchiveDiff(self.old, self.new)
+        added, removed, changed = diff.compare()
+        self.assertEqual([entry[0] for entry in changed], [('job', 'a'), ('log', 'a.log'), ('log', 'team/build7.log')])
+        content = diff.content_diff(changed)
+        self.assertIn('-1\n+2\n', content)
+        self.assertNotIn('one', content)
+
+
+if __name__ == '__main__':
+    unittest.main()
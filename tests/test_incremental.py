@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_jenkins import BackupManifest, MyJenkins, build_argparser
+
+
+def write_archive(file_name, members, created, removed=()):
+    with zipfile.ZipFile(file_name, 'w') as zip_file:
+        zip_file.writestr('backup/snapshot.json', json.dumps({'created': created, 'removed': list(removed)}))
+        for member, content in members.items():
+            zip_file.writestr('backup/' + member, content)
+
+
+class IncrementalChainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # details.json is kept in the working directory
+        os.chdir(self.directory.name)
+        self.zip_dir = os.path.join(self.directory.name, 'zip')
+        os.mkdir(self.zip_dir)
+        args = build_argparser().parse_args(['-i', '-bd', os.path.join(self.directory.name, 'backup'), '-zd', self.zip_dir])
+        self.jenkins = MyJenkins(args)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.zip_dir, name)
+
+    def test_chain_follows_recorded_time_not_mtime(self):
+        write_archive(self.path('backup.zip'), {'jobs/a.xml': '1'}, '20260101T000000')
+        write_archive(self.path('backup-incr-1.zip'), {}, '20260103T000000')
+        write_archive(self.path('backup-incr-2.zip'), {}, '20260102T000000')
+        write_archive(self.path('backup-incr-0.zip'), {}, '20251231T000000')
+        os.utime(self.path('backup-incr-2.zip'), (0, 0))
+        self.assertEqual(self.jenkins.incremental_chain(),
+                         [self.path('backup.zip'), self.path('backup-incr-2.zip'), self.path('backup-incr-1.zip')])
+
+    def test_layering_applies_newest_copy_and_tombstones(self):
+        write_archive(self.path('backup.zip'), {'jobs/a.xml': 'a1', 'jobs/b.xml': 'b1'}, '20260101T000000')
+        write_archive(self.path('backup-incr-1.zip'), {'jobs/a.xml': 'a2'}, '20260102T000000', removed=['jobs/b.xml'])
+        self.jenkins.decompress_incremental_chain()
+        jobs_dir = os.path.join(self.directory.name, 'backup', 'jobs')
+        self.assertEqual(sorted(os.listdir(jobs_dir)), ['a.xml'])
+        with open(os.path.join(jobs_dir, 'a.xml')) as job_file:
+            self.assertEqual(job_file.read(), 'a2')
+
+    def test_full_run_prunes_hashes_of_items_not_written(self):
+        with open('details.json', 'w') as json_file:
+            json.dump({'Hashes': {'jobs/a.xml': 'x', 'jobs/gone.xml': 'y', 'nodes/n.xml': 'z'}}, json_file)
+        self.jenkins.create_backup_dir()
+        self.jenkins.write_backup_file(os.path.join(self.jenkins.jobs_dir, 'a.xml'), '<a/>')
+        self.assertEqual(self.jenkins.record_removed_items(), ['jobs/gone.xml'])
+        self.assertEqual(sorted(self.jenkins.read_json_file('details.json', 'Hashes')), ['jobs/a.xml', 'nodes/n.xml'])
+        self.assertEqual(json.loads(self.jenkins.snapshot_info('backup.zip', 'backup-incr.zip'))['removed'], ['jobs/gone.xml'])
+
+
+class ManifestJournalTest(unittest.TestCase):
+
+    def test_journal_replays_removals(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'details.json')
+            manifest = BackupManifest(file_name, journal=True)
+            manifest.add('Hashes', 'jobs/a.xml', 'x')
+            manifest.add('Hashes', 'jobs/b.xml', 'y')
+            manifest.remove('Hashes', 'jobs/a.xml')
+            manifest.journal_file.close()
+            self.assertEqual(BackupManifest(file_name).get('Hashes'), {'jobs/b.xml': 'y'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_jenkins import BackupItem, MyJenkins, build_argparser
+
+
+class FakeResponse():
+
+    def __init__(self, body, status=200):
+        self.body = body
+        self.status_code = status
+        self.ok = status < 400
+        self.headers = {}
+        self.buffered = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text(self):
+        self.buffered = True
+        return self.body.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.body)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class FakeSession():
+    """
+    Serves the paths of a small controller, 404 for everything else
+    """
+    timeout = 5
+
+    def __init__(self, url, pages):
+        self.url = url
+        self.pages = pages
+        self.requested = []
+        self.responses = []
+
+    def get(self, url, **kwargs):
+        path = url[len(self.url):]
+        self.requested.append(path)
+        response = FakeResponse(self.pages[path]) if path in self.pages else FakeResponse(b'not found', 404)
+        self.responses.append((path, response))
+        return response
+
+    def buffered_logs(self):
+        return [path for path, response in self.responses if path.endswith('/logText/progressiveText') and response.buffered]
+
+
+class PipelineLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # details.json is kept in the working directory
+        os.chdir(self.directory.name)
+        self.backup_dir = os.path.join(self.directory.name, 'backup')
+        args = build_argparser().parse_args(['-bd', self.backup_dir, '-zd', os.path.join(self.directory.name, 'zip')])
+        self.jenkins = MyJenkins(args)
+        self.jenkins.loggers = True
+        self.jenkins.inventory_failed = True
+        self.jenkins.session = FakeSession(self.jenkins.url, {
+            '/job/top/config.xml': b'<project>top</project>',
+            '/job/top/api/json': b'{"lastBuild": {"number": 3}}',
+            '/job/top/3/logText/progressiveText': b'top log\n' * 1000,
+            '/job/team/job/release/job/build/config.xml': b'<project>build</project>',
+            '/job/team/job/release/job/build/api/json': b'{"lastBuild": {"number": 7}}',
+            '/job/team/job/release/job/build/7/logText/progressiveText': b'nested log\n' * 1000,
+            '/job/team/job/release/config.xml': b'<com.cloudbees.hudson.plugins.folder.Folder/>',
+            '/view/all/api/json': b'{"lastBuild": {"number": 2}}',
+            '/view/all/2/logText/progressiveText': b'view log\n' * 1000,
+            '/plugin/git/api/json': b'{"lastBuild": {"number": 4}}',
+            '/plugin/git/4/logText/progressiveText': b'plugin log\n' * 1000,
+        })
+        self.jenkins.create_backup_dir()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_nested_job_log_is_streamed_with_its_config(self):
+        items = [BackupItem('job', 'top'), BackupItem('job', 'release', 'team', True), BackupItem('job', 'build', 'team/release')]
+        self.assertTrue(self.jenkins.backup_all_streaming(workers=2, items=iter(items)))
+        log_file = os.path.join(self.jenkins.folder_log_dir, 'team', 'release', 'build7.log')
+        with open(log_file, 'rb') as log:
+            self.assertEqual(log.read(), b'nested log\n' * 1000)
+        with open(os.path.join(self.jenkins.jobs_log_dir, 'top.log'), 'rb') as log:
+            self.assertEqual(log.read(), b'top log\n' * 1000)
+        with open(self.jenkins.folder_job_file('team/release', 'build')) as config:
+            self.assertEqual(config.read(), '<project>build</project>')
+        # a folder has no console of its own
+        self.assertNotIn('/job/team/job/release/api/json', self.jenkins.session.requested)
+        self.jenkins.flush_manifests()
+        self.assertIn('team/release/build', self.jenkins.read_json_file('details.json', 'Folders'))
+        self.assertEqual(self.jenkins.session.buffered_logs(), [])
+
+    def test_nested_jobs_are_not_logged_without_loggers(self):
+        self.jenkins.loggers = False
+        self.assertTrue(self.jenkins.backup_all_streaming(items=iter([BackupItem('job', 'build', 'team/release')])))
+        self.assertFalse(any(path.endswith('/logText/progressiveText') for path in self.jenkins.session.requested))
+
+    def read(self, file_name):
+        with open(file_name, 'rb') as log:
+            return log.read()
+
+    def test_view_and_plugin_logs_are_streamed_once(self):
+        self.assertTrue(self.jenkins.backup_view_log('all'))
+        self.assertTrue(self.jenkins.backup_plugin_build_log('git'))
+        for extension in ('.log', '.xml'):
+            self.assertEqual(self.read(os.path.join(self.jenkins.views_log_dir, 'all' + extension)), b'view log\n' * 1000)
+            self.assertEqual(self.read(os.path.join(self.jenkins.plugins_log_dir, 'git4' + extension)), b'plugin log\n' * 1000)
+        self.assertEqual(self.jenkins.session.requested.count('/plugin/git/4/logText/progressiveText'), 1)
+        self.assertEqual(self.jenkins.session.buffered_logs(), [])
+
+    def test_streaming_variants_match_the_getters(self):
+        file_names = [os.path.join(self.directory.name, 'top.log')]
+        self.assertEqual(self.jenkins.stream_job_build_log('top', file_names), len(b'top log\n' * 1000))
+        self.assertEqual(self.read(file_names[0]).decode('utf-8'), self.jenkins.get_job_build_log('top'))
+        file_names = [os.path.join(self.directory.name, 'build.log')]
+        self.assertTrue(self.jenkins.stream_folder_job_build_log('team/release', 'build', file_names))
+        self.assertEqual(self.read(file_names[0]).decode('utf-8'), self.jenkins.get_folder_job_build_log('team/release', 'build'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_jenkins import JenkinsSession, RateLimiter, RetryPolicy
+
+
+class FakeClock():
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('main_jenkins.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_window_shrinks_on_slow_responses_and_grows_back_on_fast_ones(self):
+        limiter = RateLimiter(concurrency=4, target_latency=1.0)
+        limiter.acquire()
+        limiter.release(2.5)
+        self.assertEqual(limiter.stats()['concurrency'], 3)
+        # additive increase: about one slot per window (concurrency) of fast responses
+        for _ in range(2):
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertEqual(limiter.stats()['concurrency'], 3)
+        for _ in range(2):
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertEqual(limiter.stats()['concurrency'], 4)
+        for _ in range(10):
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertEqual(limiter.stats()['concurrency'], 4)
+
+    def test_429_and_503_halve_concurrency_and_rate(self):
+        limiter = RateLimiter(rate=10, concurrency=8)
+        limiter.acquire()
+        limiter.release(0.1, 429)
+        self.assertEqual(limiter.stats(), {'rate': 5, 'concurrency': 4, 'active': 0, 'queue_depth': 0})
+        limiter.acquire()
+        limiter.release(0.1, 503)
+        self.assertEqual((limiter.stats()['rate'], limiter.stats()['concurrency']), (2.5, 2))
+        for _ in range(3):
+            self.clock.now += 1
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertAlmostEqual(limiter.stats()['rate'], 2.8)
+        self.assertLessEqual(limiter.stats()['concurrency'], 8)
+
+    def test_concurrency_never_drops_below_one(self):
+        limiter = RateLimiter(concurrency=2)
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(0.1, 503)
+        self.assertEqual(limiter.stats()['concurrency'], 1)
+
+    def test_retry_after_pauses_every_caller(self):
+        limiter = RateLimiter(concurrency=4)
+        limiter.acquire()
+        limiter.release(0.1, 503, retry_after=5)
+        self.assertEqual(limiter.try_acquire(), 5)
+        self.clock.now += 4
+        self.assertEqual(limiter.try_acquire(), 1)
+        self.clock.now += 1
+        self.assertEqual(limiter.try_acquire(), 0)
+
+    def test_token_bucket_caps_requests_per_second(self):
+        limiter = RateLimiter(rate=2, concurrency=8)
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertAlmostEqual(limiter.try_acquire(), 0.5)
+        self.clock.now += 0.5
+        self.assertEqual(limiter.try_acquire(), 0)
+
+    def test_full_window_waits_for_a_release(self):
+        limiter = RateLimiter(concurrency=1)
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertIsNone(limiter.try_acquire())
+        limiter.release(0.1)
+        self.assertEqual(limiter.try_acquire(), 0)
+
+
+class BlockingAcquireTest(unittest.TestCase):
+
+    def test_acquire_blocks_until_release_and_counts_the_queue(self):
+        limiter = RateLimiter(concurrency=1)
+        limiter.acquire()
+        acquired = threading.Event()
+        waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        waiter.start()
+        deadline = time.monotonic() + 5
+        while limiter.stats()['queue_depth'] != 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(limiter.stats()['queue_depth'], 1)
+        self.assertFalse(acquired.is_set())
+        limiter.release(0.1)
+        self.assertTrue(acquired.wait(5))
+        waiter.join()
+        self.assertEqual(limiter.stats()['active'], 1)
+
+    def test_async_acquire_shares_the_same_slots(self):
+        limiter = RateLimiter(concurrency=1)
+        limiter.acquire()
+        async def acquire_after_release():
+            task = asyncio.ensure_future(limiter.acquire_async(poll=0.01))
+            await asyncio.sleep(0.05)
+            self.assertFalse(task.done())
+            self.assertEqual(limiter.stats()['queue_depth'], 1)
+            limiter.release(0.1)
+            await asyncio.wait_for(task, 5)
+        asyncio.run(acquire_after_release())
+        self.assertEqual(limiter.stats(), {'rate': None, 'concurrency': 1, 'active': 1, 'queue_depth': 0})
+
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    """
+    Transport answering from a list of (status, headers, body), one per request
+    """
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        status, headers, body = self.responses.pop(0)
+        self.sent += 1
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class JenkinsSessionTest(unittest.TestCase):
+
+    def session(self, responses, attempts=3):
+        session = JenkinsSession(RateLimiter(concurrency=4), RetryPolicy(attempts=attempts, backoff=0, jitter=0))
+        session.mount('http://jenkins/', FakeAdapter(responses))
+        return session
+
+    def test_plain_response_releases_its_slot_at_once(self):
+        session = self.session([(200, {}, b'<project/>')])
+        self.assertEqual(session.get('http://jenkins/job/a/config.xml').text, '<project/>')
+        self.assertEqual(session.limiter.stats()['active'], 0)
+
+    def test_streamed_body_holds_the_slot_until_read(self):
+        session = self.session([(200, {}, b'x' * 10000)])
+        response = session.get('http://jenkins/job/a/1/logText/progressiveText', stream=True)
+        self.assertEqual(session.limiter.stats()['active'], 1)
+        self.assertEqual(sum(len(chunk) for chunk in response.iter_content(1024)), 10000)
+        self.assertEqual(session.limiter.stats()['active'], 0)
+        # closing afterwards must not hand the slot back twice
+        response.close()
+        self.assertEqual(session.limiter.stats()['active'], 0)
+
+    def test_streamed_body_closed_unread_releases_the_slot(self):
+        session = self.session([(200, {}, b'x' * 10000)])
+        with session.get('http://jenkins/job/a/1/logText/progressiveText', stream=True):
+            self.assertEqual(session.limiter.stats()['active'], 1)
+        self.assertEqual(session.limiter.stats()['active'], 0)
+
+    def test_transient_status_is_retried_after_retry_after(self):
+        session = self.session([(503, {'Retry-After': '0.2'}, b''), (200, {}, b'ok')])
+        with mock.patch('main_jenkins.time.sleep') as sleep:
+            self.assertEqual(session.get('http://jenkins/api/json').text, 'ok')
+        sleep.assert_called_once_with(0.2)
+        self.assertEqual(session.limiter.stats()['concurrency'], 2)
+        self.assertEqual(session.limiter.stats()['active'], 0)
+
+    def test_post_is_not_retried(self):
+        session = self.session([(503, {}, b''), (200, {}, b'')])
+        with mock.patch('main_jenkins.time.sleep') as sleep:
+            self.assertEqual(session.post('http://jenkins/createItem?name=a', data='<project/>').status_code, 503)
+        sleep.assert_not_called()
+
+    def test_last_attempt_returns_the_failure(self):
+        session = self.session([(502, {}, b'')] * 3)
+        with mock.patch('main_jenkins.time.sleep'):
+            self.assertEqual(session.get('http://jenkins/api/json').status_code, 502)
+        self.assertEqual(session.limiter.stats()['active'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_jenkins import FOLDER_CLASS, MyJenkins, RestoreItem, build_argparser
+
+
+class FakeResponse():
+
+    def __init__(self, status=200, body=''):
+        self.status_code = status
+        self.ok = status < 400
+        self.text = body
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeSession():
+    """
+    Target controller holding live configs by path; posts are recorded and
+    answered with post_status
+    """
+    timeout = 5
+
+    def __init__(self, url, live, plugins=(), post_status=200):
+        self.url = url
+        self.live = live
+        self.plugins = plugins
+        self.post_status = post_status
+        self.posts = []
+
+    def get(self, url, **kwargs):
+        path = url[len(self.url):]
+        if path.startswith('/pluginManager/api/json'):
+            return FakeResponse(body=json.dumps({'plugins': [{'shortName': name} for name in self.plugins]}))
+        if path in self.live:
+            status, body = self.live[path]
+            return FakeResponse(status, body)
+        return FakeResponse(404)
+
+    def post(self, url, data=None, **kwargs):
+        self.posts.append(url[len(self.url):])
+        return FakeResponse(self.post_status)
+
+
+class ReconcileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backup_dir = os.path.join(self.directory.name, 'backup')
+        args = build_argparser().parse_args(['-rc', '-bd', self.backup_dir, '-rd', self.backup_dir])
+        self.jenkins = MyJenkins(args)
+        self.jenkins.inventory_failed = True
+        self.file_name = os.path.join(self.directory.name, 'build.xml')
+        with open(self.file_name, 'w') as config_file:
+            config_file.write('<project>build</project>\n')
+        self.item = RestoreItem('job', 'build', 'team', self.file_name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def reconcile(self, item, live, plugins=(), post_status=200):
+        self.jenkins.session = FakeSession(self.jenkins.url, live, plugins, post_status)
+        self.jenkins.live_plugins = None
+        self.jenkins.reconciled = {}
+        return self.jenkins.reconcile_item(item)
+
+    def test_missing_item_is_created(self):
+        self.assertTrue(self.reconcile(self.item, {}))
+        self.assertEqual(self.jenkins.session.posts, ['/job/team/createItem?name=build'])
+        self.assertEqual(self.jenkins.reconciled, {'created': 1})
+
+    def test_failed_create_is_counted_as_failed(self):
+        self.assertFalse(self.reconcile(self.item, {}, post_status=500))
+        self.assertEqual(self.jenkins.reconciled, {'failed': 1})
+
+    def test_different_item_is_updated_in_place(self):
+        self.assertTrue(self.reconcile(self.item, {'/job/team/job/build/config.xml': (200, '<project>old</project>')}))
+        self.assertEqual(self.jenkins.session.posts, ['/job/team/job/build/config.xml'])
+        self.assertEqual(self.jenkins.reconciled, {'updated': 1})
+
+    def test_failed_update_is_counted_as_failed(self):
+        self.assertFalse(self.reconcile(self.item, {'/job/team/job/build/config.xml': (200, '<project>old</project>')}, post_status=403))
+        self.assertEqual(self.jenkins.reconciled, {'failed': 1})
+
+    def test_identical_item_is_skipped(self):
+        # line endings and surrounding whitespace do not count as a change
+        self.assertTrue(self.reconcile(self.item, {'/job/team/job/build/config.xml': (200, '<project>build</project>\r\n')}))
+        self.assertEqual(self.jenkins.session.posts, [])
+        self.assertEqual(self.jenkins.reconciled, {'unchanged': 1})
+
+    def test_unreadable_live_config_fails_without_writing(self):
+        self.assertFalse(self.reconcile(self.item, {'/job/team/job/build/config.xml': (500, 'error')}))
+        self.assertEqual(self.jenkins.session.posts, [])
+        self.assertEqual(self.jenkins.reconciled, {'failed': 1})
+
+    def test_plugins_are_reconciled_by_presence(self):
+        os.makedirs(self.jenkins.plugins_dir)
+        with open(os.path.join(self.jenkins.plugins_dir, 'git.xml'), 'w') as plugin_file:
+            plugin_file.write('<plugin/>')
+        self.assertTrue(self.reconcile(RestoreItem('plugin', 'git'), {}, plugins=['git']))
+        self.assertEqual(self.jenkins.reconciled, {'unchanged': 1})
+        self.assertTrue(self.reconcile(RestoreItem('plugin', 'git'), {}, plugins=['ant']))
+        self.assertEqual(self.jenkins.session.posts, ['/pluginManager/installNecessaryPlugins'])
+        self.assertEqual(self.jenkins.reconciled, {'created': 1})
+        self.assertFalse(self.reconcile(RestoreItem('plugin', 'git'), {}, post_status=500))
+        self.assertEqual(self.jenkins.reconciled, {'failed': 1})
+
+
+class CreateFolderJobTest(unittest.TestCase):
+
+    def test_nested_folder_path_is_posted_under_every_folder(self):
+        with tempfile.TemporaryDirectory() as directory:
+            jenkins = MyJenkins(build_argparser().parse_args(['-bd', os.path.join(directory, 'backup')]))
+            jenkins.session = FakeSession(jenkins.url, {})
+            file_name = jenkins.folder_job_file('team/release', 'build')
+            os.makedirs(os.path.dirname(file_name))
+            with open(file_name, 'w') as config_file:
+                config_file.write('<project/>')
+            self.assertTrue(jenkins.create_folder_job('team/release', 'build'))
+            self.assertEqual(jenkins.session.posts, ['/job/team/job/release/createItem?name=build'])
+
+
+class RestorePlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backup_dir = os.path.join(self.directory.name, 'backup')
+        self.jenkins = MyJenkins(build_argparser().parse_args(['-bd', self.backup_dir, '-w', '4']))
+        self.jenkins.inventory_failed = True
+        folder = '<' + FOLDER_CLASS + '/>'
+        job = '<project/>'
+        self.write('config/config.xml', '<hudson/>')
+        self.write('plugins/git.xml', '<plugin/>')
+        self.write('jobs/top.xml', job)
+        self.write('jobs/team.xml', folder)
+        self.write('folder/jobs/team/release.xml', folder)
+        self.write('folder/jobs/team/tool.xml', job)
+        self.write('folder/jobs/team/release/nightly.xml', folder)
+        self.write('folder/jobs/team/release/build.xml', job)
+        self.write('folder/jobs/team/release/nightly/deploy.xml', job)
+        # flat layout of older backups, placed by FolderJobs
+        self.write('folder/jobs/legacy.xml', job)
+        self.write('details.json', json.dumps({'FolderJobs': {'legacy': 'team/release'}}))
+        self.write('views/all.xml', '<view/>')
+        self.write('nodes/agent.xml', '<slave/>')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        file_name = os.path.join(self.backup_dir, *name.split('/'))
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, 'w') as backup_file:
+            backup_file.write(content)
+
+    def path(self, item):
+        return item.folder + '/' + item.name if item.folder else item.name
+
+    def test_levels_run_config_plugins_folders_top_down_then_jobs_views_nodes(self):
+        levels = [sorted((item.kind, self.path(item)) for item in level) for level in self.jenkins.restore_plan()]
+        self.assertEqual(levels, [
+            [('config', 'config')],
+            [('plugin', 'git')],
+            [('job', 'team')],
+            [('job', 'team/release')],
+            [('job', 'team/release/nightly')],
+            [('job', 'team/release/build'), ('job', 'team/release/legacy'), ('job', 'team/release/nightly/deploy'), ('job', 'team/tool'), ('job', 'top')],
+            [('view', 'all')],
+            [('node', 'agent')],
+        ])
+
+    def test_every_item_is_posted_after_its_folder(self):
+        self.jenkins.session = FakeSession(self.jenkins.url, {})
+        self.assertTrue(self.jenkins.restore_scheduled())
+        posts = self.jenkins.session.posts
+        self.assertEqual(len(posts), 12)
+        self.assertEqual(posts[:2], ['/config.xml', '/pluginManager/installNecessaryPlugins'])
+        created = ['/job/team/createItem?name=release', '/job/team/job/release/createItem?name=nightly', '/job/team/job/release/job/nightly/createItem?name=deploy']
+        self.assertLess(posts.index('/createItem?name=team'), posts.index(created[0]))
+        self.assertLess(posts.index(created[0]), posts.index(created[1]))
+        self.assertLess(posts.index(created[1]), posts.index(created[2]))
+        self.assertLess(max(posts.index(post) for post in posts if 'createItem' in post), posts.index('/createView?name=all'))
+        self.assertEqual(posts[-1], '/computer/doCreateItem?name=agent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import argparse
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_jenkins import Selection, build_argparser, item_types, validate_args
+
+
+class GlobTest(unittest.TestCase):
+
+    def matches(self, pattern, path):
+        return Selection.compile(pattern)(path)
+
+    def test_star_stays_inside_one_folder(self):
+        self.assertTrue(self.matches('team-*/release', 'team-a/release'))
+        self.assertFalse(self.matches('team-*/release', 'team-a/x/release'))
+
+    def test_double_star_spans_folders(self):
+        self.assertTrue(self.matches('team-a/**', 'team-a/release/build'))
+        self.assertTrue(self.matches('**/build', 'build'))
+        self.assertTrue(self.matches('**/build', 'team-a/release/build'))
+        self.assertFalse(self.matches('team-a/**', 'team-b/build'))
+
+    def test_question_mark_is_one_character_inside_a_folder(self):
+        self.assertTrue(self.matches('job-?', 'job-1'))
+        self.assertFalse(self.matches('a?b', 'a/b'))
+
+    def test_pattern_without_slash_matches_name_at_any_depth(self):
+        self.assertTrue(self.matches('build', 'team-a/release/build'))
+        self.assertFalse(self.matches('build', 'build/deploy'))
+
+    def test_regex_searches_path(self):
+        self.assertTrue(self.matches('re:release/.*-nightly$', 'team-a/release/build-nightly'))
+        self.assertFalse(self.matches('re:^release', 'team-a/release'))
+
+    def test_glob_metacharacters_are_literal(self):
+        self.assertTrue(self.matches('a.b+c', 'a.b+c'))
+        self.assertFalse(self.matches('a.b+c', 'axbbc'))
+
+
+class SelectionTest(unittest.TestCase):
+
+    def test_include_exclude_and_types(self):
+        selection = Selection(include=['team-a/**'], exclude=['**/tmp-*'], types=['job'])
+        self.assertTrue(selection.matches('job', 'team-a/build'))
+        self.assertFalse(selection.matches('job', 'team-a/tmp-build'))
+        self.assertFalse(selection.matches('job', 'team-b/build'))
+        self.assertFalse(selection.matches('view', 'team-a/build'))
+
+    def test_everything_is_included_without_include_patterns(self):
+        self.assertTrue(Selection().matches('plugin', 'git'))
+
+    def test_top_level_leaves_nested_items_out(self):
+        selection = Selection(exclude=['build'], types=('job', 'folder'), top_level=True)
+        self.assertTrue(selection.matches('job', 'deploy'))
+        self.assertFalse(selection.matches('job', 'build'))
+        self.assertFalse(selection.matches('job', 'team-a/deploy'))
+
+    def test_unknown_type_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Selection(types=['jobs'])
+        with self.assertRaises(argparse.ArgumentTypeError):
+            item_types('job,jobs')
+        self.assertEqual(item_types('job, folder'), ['job', 'folder'])
+
+
+class ValidateArgsTest(unittest.TestCase):
+
+    def validate(self, *argv):
+        argparser = build_argparser()
+        validate_args(argparser, argparser.parse_args(list(argv)))
+
+    def assertRejected(self, *argv):
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            self.validate(*argv)
+
+    def test_catalog_at_needs_catalog_history(self):
+        self.assertRejected('-cat', 'catalog.db', '-ca', '2026-10-18T23:59')
+        self.validate('-cat', 'catalog.db', '-ch', 'team/build', '-ca', '2026-10-18T23:59')
+
+    def test_staging_options_are_rejected_with_stream_archive(self):
+        self.assertRejected('-b', '-a', '-sa', '-cr')
+        self.assertRejected('-b', '-a', '-sa', '-cw', '4')
+        self.validate('-b', '-a', '-sa')
+        self.validate('-b', '-a', '-cr', '-cw', '4')
+
+
+if __name__ == '__main__':
+    unittest.main()